@@ -3,7 +3,6 @@ import os
 import datetime
 import traceback
 import logging
-from pathlib import Path
 from dotenv import load_dotenv
 from backend.email_reader import EmailReader
 from backend.context_analyzer import ContextAnalyzer
@@ -66,15 +65,18 @@ try:
         st.warning("⚠️ Your Gmail authorization is missing send permission. You won't be able to send replies.")
         if st.button("Reauthorize with Send Permission"):
             # Delete the token file to force reauthorization
-            token_path = Path('token.pickle')
-            if token_path.exists():
-                token_path.unlink()
+            revoke_credentials()
             st.success("Token deleted. Please refresh the page to reauthorize.")
             st.button("Refresh Now", on_click=st.rerun)
     
     context_analyzer = ContextAnalyzer()
     reply_generator = ReplyGenerator()
-    meeting_scheduler = MeetingScheduler(gmail_creds)
+    # Keep one scheduler per session so its timezone and FreeBusy caches survive reruns;
+    # reauthorizing yields new credentials and a fresh scheduler
+    if st.session_state.get('meeting_scheduler_creds') is not gmail_creds:
+        st.session_state.meeting_scheduler = MeetingScheduler(gmail_creds)
+        st.session_state.meeting_scheduler_creds = gmail_creds
+    meeting_scheduler = st.session_state.meeting_scheduler
     calendar_manager = CalendarManager(meeting_scheduler)
     email_translator = EmailTranslator()
 except Exception as e:
@@ -8,7 +8,7 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from utils.auth import get_gmail_service
+from utils.auth import get_gmail_service, TOKEN_PATH
 import email
 from typing import List, Dict, Any
 import os
@@ -39,10 +39,10 @@ class EmailReader:
             # If no service provided, create one using credentials
             logger.info("No service provided, creating one from credentials")
             credentials = Credentials.from_authorized_user_file(
-                'token.pickle',
+                str(TOKEN_PATH),
                 ['https://www.googleapis.com/auth/gmail.readonly', 'https://www.googleapis.com/auth/gmail.send']
             )
-            self.service = build('gmail', 'v1', credentials=credentials)
+            self.service = build('gmail', 'v1', credentials=credentials, static_discovery=True)
         else:
             logger.info("Using provided Gmail service")
             self.service = gmail_service
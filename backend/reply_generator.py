@@ -50,12 +50,14 @@ class ReplyGenerator:
             }
 
     def _format_thread_analysis(self, analysis: Dict[str, Any]) -> str:
+        sentiment = analysis['sentiment']
+        bullets = "\n".join(["- " + point for point in analysis['key_points']])
         return (
             f"Thread Analysis:\n{analysis['thread_analysis']}\n\n"
-            f"Sentiment: {analysis['sentiment']['sentiment']}\n"
-            f"Tone: {analysis['sentiment'].get('tone', 'unknown')}\n"
+            f"Sentiment: {sentiment['sentiment']}\n"
+            f"Tone: {sentiment.get('tone', 'unknown')}\n"
             f"Urgency: {analysis['urgency']}\n\n"
-            f"Key Points:\n" + "\n".join(f"- {point}" for point in analysis['key_points'])
+            f"Key Points:\n{bullets}"
         )
 
     def _parse_replies(self, response: str) -> Dict[str, str]:
@@ -1,22 +1,174 @@
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import sys
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+import asyncio
+import threading
+from datetime import datetime, timedelta, time, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 from dotenv import load_dotenv
-import pytz
+from cachetools import TTLCache
 import re
 import logging
+import numpy as np
+from itertools import islice
+from collections import namedtuple
+from dataclasses import dataclass
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Common meeting request patterns, merged into a single alternation so the
+# body is scanned once instead of once per pattern
+_MEETING_PATTERNS = [
+    r"schedule.*meeting",
+    r"set up.*call",
+    r"book.*time",
+    r"find.*slot",
+    r"available.*time",
+    r"like to meet",
+    r"discuss.*in person",
+    r"let's meet",
+    r"can we meet",
+    r"meeting request"
+]
+_MEETING_RE = re.compile("|".join(_MEETING_PATTERNS), re.IGNORECASE)
+
+# Only this much of a body is scanned; meeting requests appear near the top
+# and the ".*" patterns get expensive on very large bodies
+_MAX_SCAN_CHARS = 50_000
+
+# Date, time and weekday mentions inside a meeting request
+_DATE_RE = re.compile(r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b')
+# Month, day and year groups of a date already matched by _DATE_RE
+_DATE_PARTS_RE = re.compile(r'(\d{1,2})[-/](\d{1,2})[-/](\d{2,4})')
+_TIME_RE = re.compile(r'\b\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)?\b')
+_WEEKDAY_RE = re.compile(
+    r'\b(Mon(?:day)?|Tue(?:sday)?|Wed(?:nesday)?|Thu(?:rsday)?|Fri(?:day)?|Sat(?:urday)?|Sun(?:day)?)\b',
+    re.IGNORECASE
+)
+
+# Basic attendee address check: one @, no whitespace, a dot in the domain
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+def _filter_valid_emails(emails: List[str]) -> List[str]:
+    """Return the addresses that look valid, logging the rest in one warning."""
+    valid = [email for email in emails if _EMAIL_RE.match(email)]
+    if len(valid) != len(emails):
+        invalid = [email for email in emails if not _EMAIL_RE.match(email)]
+        logger.warning(f"Invalid email addresses: {', '.join(invalid)}")
+    return valid
+
+# Internal records; plain dicts are only built for what is returned to callers
+_Busy = namedtuple('_Busy', 'start end')  # POSIX seconds
+_Slot = namedtuple('_Slot', 'start end')  # aware datetimes
+
+@dataclass(slots=True)
+class _Meeting:
+    """An upcoming calendar event, formatted for display."""
+    id: str
+    summary: str
+    start: str
+    end: str
+    attendees: List[Dict[str, Any]]
+    location: str
+    description: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'summary': self.summary,
+            'start': self.start,
+            'end': self.end,
+            'attendees': self.attendees,
+            'location': self.location,
+            'description': self.description
+        }
+
+# datetime.fromisoformat understands a trailing "Z" from Python 3.11 on
+_FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+def _parse_iso(value: str) -> datetime:
+    """Parse an RFC 3339 timestamp from the Calendar API, only rewriting a trailing 'Z' when needed."""
+    if not _FROMISOFORMAT_ACCEPTS_Z and value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def _iter_busy_timestamps(calendars: Dict[str, Any]) -> Iterator[_Busy]:
+    """Yield (start, end) POSIX timestamps for every busy entry in a FreeBusy response."""
+    for calendar_id, calendar in calendars.items():
+        if calendar.get('errors'):
+            logger.warning(f"Could not get busy times for {calendar_id}: {calendar['errors']}")
+        for busy in calendar.get('busy', []):
+            try:
+                yield _Busy(_parse_iso(busy['start']).timestamp(), _parse_iso(busy['end']).timestamp())
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Error processing busy slot: {e}")
+
+def _format_event(event: Dict[str, Any]) -> _Meeting:
+    """Format a Calendar API event for display."""
+    start = event.get('start', {}).get('dateTime', event.get('start', {}).get('date', 'Unknown'))
+    end = event.get('end', {}).get('dateTime', event.get('end', {}).get('date', 'Unknown'))
+    
+    # Convert to datetime objects if possible
+    try:
+        if 'T' in start:  # This is a dateTime string
+            start = _parse_iso(start).strftime("%Y-%m-%d %I:%M %p")
+    except Exception as e:
+        logger.warning(f"Error parsing start time: {e}")
+        
+    try:
+        if 'T' in end:  # This is a dateTime string
+            end = _parse_iso(end).strftime("%Y-%m-%d %I:%M %p")
+    except Exception as e:
+        logger.warning(f"Error parsing end time: {e}")
+    
+    return _Meeting(
+        id=event['id'],
+        summary=event.get('summary', 'No Title'),
+        start=start,
+        end=end,
+        attendees=event.get('attendees', []),
+        location=event.get('location', ''),
+        description=event.get('description', '')
+    )
+
+def _merge_intervals(intervals: Iterable[_Busy]) -> List[_Busy]:
+    """Sort (start, end) intervals and merge overlapping ones into disjoint intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1].end:
+            if end > merged[-1].end:
+                merged[-1] = _Busy(merged[-1].start, end)
+        else:
+            merged.append(_Busy(start, end))
+    return merged
+
+def _event_loop_running() -> bool:
+    """Whether this thread is already running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
 class MeetingScheduler:
     def __init__(self, credentials):
         """Initialize the meeting scheduler with Gmail credentials."""
-        self.service = build('calendar', 'v3', credentials=credentials)
+        self.credentials = credentials
+        self.service = build('calendar', 'v3', credentials=credentials, static_discovery=True)
         self.timezone = os.getenv('TIMEZONE', 'UTC')
+        self._cached_tz = None
+        self._tz_obj = None
+        # Parsed FreeBusy results keyed on (timeMin, timeMax, calendar ids), kept briefly
+        # so repeated lookups don't repeat the query (app.py keeps one scheduler per
+        # session, so this spans UI reruns); cleared when events change
+        self._freebusy_cache = TTLCache(maxsize=64, ttl=300)
+        self._freebusy_lock = threading.Lock()
     
     def extract_meeting_requests(self, email_body: str) -> List[Dict[str, Any]]:
         """
@@ -32,158 +184,234 @@ class MeetingScheduler:
             logger.warning("Invalid email body provided")
             return []
             
-        meeting_requests = []
+        if len(email_body) > _MAX_SCAN_CHARS:
+            email_body = email_body[:_MAX_SCAN_CHARS]
         
-        # Common meeting request patterns
-        patterns = [
-            r"(?i)schedule.*meeting",
-            r"(?i)set up.*call",
-            r"(?i)book.*time",
-            r"(?i)find.*slot",
-            r"(?i)available.*time",
-            r"(?i)like to meet",
-            r"(?i)discuss.*in person",
-            r"(?i)let's meet",
-            r"(?i)can we meet",
-            r"(?i)meeting request"
-        ]
+        # Date/time/weekday extraction only runs once the meeting gate matches
+        match = _MEETING_RE.search(email_body)
+        if not match:
+            return []
         
-        # Check for patterns
-        for pattern in patterns:
-            if re.search(pattern, email_body):
-                # Extract potential date/time mentions
-                date_matches = re.findall(r'\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b', email_body)
-                time_matches = re.findall(r'\b\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)?\b', email_body)
-                weekday_matches = re.findall(r'\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b', email_body, re.IGNORECASE)
-                
-                meeting_requests.append({
-                    'type': 'meeting_request',
-                    'dates': date_matches,
-                    'times': time_matches,
-                    'weekdays': weekday_matches,
-                    'context': email_body
-                })
+        # Extract potential date/time mentions once, no matter how many
+        # patterns the body matches
+        date_matches = _DATE_RE.findall(email_body)
+        time_matches = _TIME_RE.findall(email_body)
+        weekday_matches = _WEEKDAY_RE.findall(email_body)
         
-        return meeting_requests
+        return [{
+            'type': 'meeting_request',
+            'dates': date_matches,
+            'times': time_matches,
+            'weekdays': weekday_matches,
+            # Short window around the matched phrase; callers already hold the full body
+            'context': email_body[max(0, match.start() - 40):match.end() + 40]
+        }]
     
-    def get_user_timezone(self) -> str:
-        """Get the user's calendar timezone setting."""
+    def get_user_timezone(self, http=None) -> str:
+        """Get the user's calendar timezone setting (fetched once per scheduler)."""
+        if self._cached_tz:
+            return self._cached_tz
         try:
-            settings = self.service.settings().get(setting='timezone').execute()
-            return settings['value']
+            settings = self.service.settings().get(setting='timezone').execute(http=http)
+            self._cached_tz = settings['value']
+            return self._cached_tz
         except Exception as e:
             logger.error(f"Error getting user timezone: {e}")
             return self.timezone
     
+    def _get_user_tz(self):
+        """Get the tzinfo object for the user's timezone, cached alongside the name."""
+        tz_name = self.get_user_timezone()
+        if self._tz_obj is None or self._tz_obj.key != tz_name:
+            self._tz_obj = ZoneInfo(tz_name)
+        return self._tz_obj
+    
+    def _new_http(self):
+        """Create a separate authorized connection; the service's own httplib2 object is not thread-safe."""
+        return AuthorizedHttp(self.credentials, http=httplib2.Http())
+    
     def get_available_slots(self, start_date: Optional[datetime] = None, 
-                          duration_minutes: int = 30, days_ahead: int = 7) -> List[Dict[str, Any]]:
-        """Get available time slots for scheduling."""
+                          duration_minutes: int = 30, days_ahead: int = 7,
+                          attendee_emails: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get available time slots for scheduling, optionally free for attendees too."""
         try:
-            # Input validation
-            if duration_minutes < 15:
-                logger.warning(f"Duration too short: {duration_minutes} minutes, using 15 minutes")
-                duration_minutes = 15
-            elif duration_minutes > 480:  # 8 hours
-                logger.warning(f"Duration too long: {duration_minutes} minutes, using 480 minutes")
-                duration_minutes = 480
-                
-            if days_ahead < 1:
-                logger.warning(f"Days ahead too few: {days_ahead}, using 1 day")
-                days_ahead = 1
-            elif days_ahead > 60:  # 2 months
-                logger.warning(f"Days ahead too many: {days_ahead}, using 60 days")
-                days_ahead = 60
-            
-            # Get the user's timezone
-            user_tz = pytz.timezone(self.get_user_timezone())
-            
-            # Set start date to now if not provided
-            if not start_date:
-                now = datetime.now(user_tz)
-                # Round to the next 30 minutes
-                minutes_to_add = 30 - (now.minute % 30)
-                if minutes_to_add == 30:
-                    minutes_to_add = 0
-                now = now + timedelta(minutes=minutes_to_add)
-                start_date = now.replace(second=0, microsecond=0)
-            else:
-                # Ensure the start date has timezone info
-                if start_date.tzinfo is None:
-                    start_date = user_tz.localize(start_date)
-            
-            end_date = start_date + timedelta(days=days_ahead)
-            
-            # Format times for API
-            time_min = start_date.isoformat()
-            time_max = end_date.isoformat()
-            
-            # Get busy times from primary calendar
-            freebusy_query = {
-                'timeMin': time_min,
-                'timeMax': time_max,
-                'items': [{'id': 'primary'}]
-            }
-            
-            freebusy_response = self.service.freebusy().query(body=freebusy_query).execute()
-            busy_slots = freebusy_response['calendars']['primary'].get('busy', [])
-            
-            # Get business hours (9 AM to 5 PM, Monday to Friday)
-            business_hours = []
-            current_date = start_date.date()
-            
-            for _ in range(days_ahead):
-                if current_date.weekday() < 5:  # Monday to Friday
-                    day_start = datetime.combine(current_date, datetime.min.time().replace(hour=9))
-                    day_start = user_tz.localize(day_start)
-                    day_end = datetime.combine(current_date, datetime.min.time().replace(hour=17))
-                    day_end = user_tz.localize(day_end)
-                    business_hours.append((day_start, day_end))
-                current_date += timedelta(days=1)
-            
-            # Find available slots within business hours
-            available_slots = []
-            slot_duration = timedelta(minutes=duration_minutes)
-            
-            for start, end in business_hours:
-                current = start
-                while current + slot_duration <= end:
-                    slot_available = True
-                    
-                    # Check if slot overlaps with any busy time
-                    for busy in busy_slots:
-                        try:
-                            busy_start = datetime.fromisoformat(busy['start'].replace('Z', '+00:00'))
-                            busy_end = datetime.fromisoformat(busy['end'].replace('Z', '+00:00'))
-                            
-                            # Convert to user timezone for comparison
-                            busy_start = busy_start.astimezone(user_tz)
-                            busy_end = busy_end.astimezone(user_tz)
-                            
-                            if current < busy_end and current + slot_duration > busy_start:
-                                slot_available = False
-                                break
-                        except (ValueError, KeyError) as e:
-                            logger.warning(f"Error processing busy slot: {e}")
-                            continue
-                    
-                    if slot_available:
-                        slot_end = current + slot_duration
-                        available_slots.append({
-                            'start': current.strftime("%Y-%m-%d %I:%M %p"),
-                            'end': slot_end.strftime("%Y-%m-%d %I:%M %p"),
-                            'duration': f"{duration_minutes} minutes"
-                        })
-                    
-                    # Move to next slot (30 minute increments)
-                    current += timedelta(minutes=30)
-            
-            # Return maximum 10 available slots
-            return available_slots[:10]
+            if not self._cached_tz and not _event_loop_running():
+                # First lookup: overlap the timezone request with the FreeBusy query.
+                # Inside a running loop asyncio.run is unavailable, so the requests run one after another.
+                return asyncio.run(self.get_available_slots_async(
+                    start_date, duration_minutes, days_ahead, attendee_emails
+                ))
+            duration_minutes, days_ahead = self._validate_slot_request(duration_minutes, days_ahead)
+            user_tz = self._get_user_tz()
+            start_date = self._resolve_start_date(start_date, user_tz)
+            busy_intervals = self._query_busy_intervals(
+                start_date, start_date + timedelta(days=days_ahead), attendee_emails
+            )
+            return self._find_free_slots(start_date, duration_minutes, days_ahead, user_tz, busy_intervals)
+        except Exception as e:
+            logger.error(f"Error getting available slots: {e}")
+            return []
+    
+    async def get_available_slots_async(self, start_date: Optional[datetime] = None,
+                                        duration_minutes: int = 30, days_ahead: int = 7,
+                                        attendee_emails: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get available time slots, running the timezone lookup and FreeBusy query concurrently.
         
+        Each request runs in a worker thread on its own connection. Until the timezone
+        is known the exact window can't be computed, so FreeBusy is queried with a
+        day of margin on both sides.
+        """
+        try:
+            duration_minutes, days_ahead = self._validate_slot_request(duration_minutes, days_ahead)
+            
+            if self._cached_tz:
+                user_tz = self._get_user_tz()
+                start_date = self._resolve_start_date(start_date, user_tz)
+                busy_intervals = await asyncio.to_thread(
+                    self._query_busy_intervals,
+                    start_date, start_date + timedelta(days=days_ahead), attendee_emails, self._new_http()
+                )
+            else:
+                approx_start = start_date or datetime.now(dt_timezone.utc)
+                if approx_start.tzinfo is None:
+                    approx_start = approx_start.replace(tzinfo=dt_timezone.utc)
+                _, busy_intervals = await asyncio.gather(
+                    asyncio.to_thread(self.get_user_timezone, self._new_http()),
+                    asyncio.to_thread(
+                        self._query_busy_intervals,
+                        approx_start - timedelta(days=1),
+                        approx_start + timedelta(days=days_ahead + 1),
+                        attendee_emails,
+                        self._new_http()
+                    )
+                )
+                user_tz = self._get_user_tz()
+                start_date = self._resolve_start_date(start_date, user_tz)
+            
+            return self._find_free_slots(start_date, duration_minutes, days_ahead, user_tz, busy_intervals)
         except Exception as e:
             logger.error(f"Error getting available slots: {e}")
             return []
     
+    def _validate_slot_request(self, duration_minutes: int, days_ahead: int) -> Tuple[int, int]:
+        """Clamp the meeting duration and look-ahead window to supported ranges."""
+        if duration_minutes < 15:
+            logger.warning(f"Duration too short: {duration_minutes} minutes, using 15 minutes")
+            duration_minutes = 15
+        elif duration_minutes > 480:  # 8 hours
+            logger.warning(f"Duration too long: {duration_minutes} minutes, using 480 minutes")
+            duration_minutes = 480
+            
+        if days_ahead < 1:
+            logger.warning(f"Days ahead too few: {days_ahead}, using 1 day")
+            days_ahead = 1
+        elif days_ahead > 60:  # 2 months
+            logger.warning(f"Days ahead too many: {days_ahead}, using 60 days")
+            days_ahead = 60
+        
+        return duration_minutes, days_ahead
+    
+    def _resolve_start_date(self, start_date: Optional[datetime], user_tz) -> datetime:
+        """Default the search start to now (rounded up to 30 minutes) and make it timezone-aware."""
+        # Set start date to now if not provided
+        if not start_date:
+            now = datetime.now(user_tz)
+            # Round to the next 30 minutes
+            minutes_to_add = 30 - (now.minute % 30)
+            if minutes_to_add == 30:
+                minutes_to_add = 0
+            now = now + timedelta(minutes=minutes_to_add)
+            return now.replace(second=0, microsecond=0)
+        
+        # Ensure the start date has timezone info
+        if start_date.tzinfo is None:
+            start_date = start_date.replace(tzinfo=user_tz)
+        return start_date
+    
+    def _query_busy_intervals(self, start_date: datetime, end_date: datetime,
+                              attendee_emails: Optional[List[str]] = None,
+                              http=None) -> List[_Busy]:
+        """Fetch busy times for the user and attendees as sorted, disjoint POSIX timestamp pairs."""
+        # Get busy times from the primary calendar and any attendee calendars
+        # in a single FreeBusy request
+        calendar_ids = ['primary'] + [email for email in (attendee_emails or []) if email != 'primary']
+        freebusy_query = {
+            'timeMin': start_date.isoformat(),
+            'timeMax': end_date.isoformat(),
+            'items': [{'id': calendar_id} for calendar_id in calendar_ids]
+        }
+        
+        cache_key = (freebusy_query['timeMin'], freebusy_query['timeMax'], tuple(calendar_ids))
+        with self._freebusy_lock:
+            cached = self._freebusy_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Only the per-calendar busy lists are needed, so skip the rest of the payload
+        freebusy_response = self.service.freebusy().query(
+            body=freebusy_query,
+            fields='calendars'
+        ).execute(http=http)
+        
+        # Parse busy times once into sorted, non-overlapping POSIX timestamp pairs
+        busy_intervals = _merge_intervals(
+            _iter_busy_timestamps(freebusy_response.get('calendars', {}))
+        )
+        with self._freebusy_lock:
+            self._freebusy_cache[cache_key] = busy_intervals
+        return busy_intervals
+    
+    def _invalidate_busy_cache(self):
+        """Drop cached FreeBusy results after the calendar has been changed."""
+        with self._freebusy_lock:
+            self._freebusy_cache.clear()
+    
+    def _find_free_slots(self, start_date: datetime, duration_minutes: int, days_ahead: int,
+                         user_tz, busy_intervals: List[_Busy]) -> List[Dict[str, Any]]:
+        """Find up to 10 business-hour slots that don't overlap any busy interval."""
+        # Business days (Monday to Friday) in the window, filtered in one vectorized step
+        first_day = np.datetime64(start_date.date(), 'D')
+        days = np.arange(first_day, first_day + days_ahead)
+        business_days = days[np.is_busday(days)].tolist()
+        if not business_days:
+            return []
+        
+        # 9 AM local start of each business day as POSIX seconds; the UTC offset
+        # is resolved per day so DST changes inside the window are respected
+        day_starts = np.array(
+            [int(datetime.combine(day, time(9), tzinfo=user_tz).timestamp()) for day in business_days],
+            dtype=np.int64
+        )
+        
+        # Find available slots within business hours (9 AM to 5 PM): every day shares
+        # the same 30 minute offsets, so all candidate starts come from one broadcast
+        slot_duration = timedelta(minutes=duration_minutes)
+        slot_seconds = duration_minutes * 60
+        slot_offsets = np.arange(0, 8 * 3600 - slot_seconds + 1, 1800, dtype=np.int64)
+        slot_starts = (day_starts[:, None] + slot_offsets[None, :]).ravel()
+        
+        # Busy intervals are disjoint and sorted, so the last one starting before
+        # a slot ends is the only one that can overlap it
+        if busy_intervals:
+            busy_starts = np.fromiter((busy.start for busy in busy_intervals), dtype=np.float64, count=len(busy_intervals))
+            busy_ends = np.fromiter((busy.end for busy in busy_intervals), dtype=np.float64, count=len(busy_intervals))
+            last_busy = np.searchsorted(busy_starts, slot_starts + slot_seconds, side='left') - 1
+            conflict = (last_busy >= 0) & (busy_ends[np.maximum(last_busy, 0)] > slot_starts)
+            slot_starts = slot_starts[~conflict]
+        
+        # Build and format datetimes lazily, only for the (at most 10) returned slots
+        slot_begins = (datetime.fromtimestamp(slot_start_ts, user_tz) for slot_start_ts in slot_starts.tolist())
+        free_slots = (_Slot(slot_start, slot_start + slot_duration) for slot_start in slot_begins)
+        return [
+            {
+                'start': slot.start.strftime("%Y-%m-%d %I:%M %p"),
+                'end': slot.end.strftime("%Y-%m-%d %I:%M %p"),
+                'duration': f"{duration_minutes} minutes"
+            }
+            for slot in islice(free_slots, 10)
+        ]
+    
     def suggest_meeting_times(
         self,
         email_body: str,
@@ -210,51 +438,31 @@ class MeetingScheduler:
         if not meeting_requests:
             return []
         
-        # Try to extract date preferences from the email
+        # Try to extract date preferences from the email (at most one request is returned)
         start_date = None
-        for request in meeting_requests:
-            if request['dates']:
-                # Try to parse dates mentioned in the email
-                for date_str in request['dates']:
-                    try:
-                        # Handle different date formats
-                        if '-' in date_str:
-                            parts = date_str.split('-')
-                        elif '/' in date_str:
-                            parts = date_str.split('/')
-                        else:
-                            continue
-                            
-                        if len(parts) == 3:
-                            # Check if month/day are in correct positions (assuming MM/DD/YYYY format)
-                            month, day = int(parts[0]), int(parts[1])
-                            
-                            # Basic validation
-                            if month < 1 or month > 12 or day < 1 or day > 31:
-                                logger.warning(f"Invalid date components in {date_str}: month={month}, day={day}")
-                                continue
-                                
-                            # Handle 2-digit year
-                            year = parts[2]
-                            if len(year) == 2:
-                                year = f"20{year}"
-                            
-                            try:
-                                extracted_date = datetime(int(year), month, day)
-                                
-                                # Only use dates in the future
-                                if extracted_date.date() >= datetime.now().date():
-                                    start_date = extracted_date
-                                    logger.info(f"Found valid date in email: {start_date}")
-                                    break
-                                else:
-                                    logger.info(f"Ignoring past date: {extracted_date}")
-                            except ValueError as e:
-                                logger.warning(f"Invalid date {date_str}: {e}")
-                                continue
-                    except (ValueError, IndexError) as e:
-                        logger.warning(f"Error parsing date {date_str}: {e}")
-                        continue
+        today = datetime.now().date()
+        # Try to parse dates mentioned in the email (assuming MM/DD/YYYY format)
+        for date_str in meeting_requests[0]['dates']:
+            match = _DATE_PARTS_RE.match(date_str)
+            month, day, year = int(match[1]), int(match[2]), int(match[3])
+            
+            # Handle 2-digit year
+            if year < 100:
+                year += 2000
+            
+            try:
+                extracted_date = datetime(year, month, day)
+            except ValueError as e:
+                logger.warning(f"Invalid date {date_str}: {e}")
+                continue
+            
+            # Only use dates in the future
+            if extracted_date.date() >= today:
+                start_date = extracted_date
+                logger.info(f"Found valid date in email: {start_date}")
+                break
+            else:
+                logger.info(f"Ignoring past date: {extracted_date}")
         
         # Get available slots starting from the extracted date or now
         available_slots = self.get_available_slots(start_date, duration_minutes, days_ahead)
@@ -297,13 +505,7 @@ class MeetingScheduler:
             return None
             
         # Validate email addresses
-        valid_attendees = []
-        for email in attendees:
-            # Basic email validation
-            if '@' in email and '.' in email.split('@')[1]:
-                valid_attendees.append(email)
-            else:
-                logger.warning(f"Invalid email address: {email}")
+        valid_attendees = _filter_valid_emails(attendees)
         
         if not valid_attendees:
             logger.error("No valid attendee email addresses provided")
@@ -314,9 +516,9 @@ class MeetingScheduler:
         
         # Ensure datetime objects have timezone info
         if start_time.tzinfo is None:
-            start_time = start_time.replace(tzinfo=pytz.timezone(user_tz))
+            start_time = start_time.replace(tzinfo=self._get_user_tz())
         if end_time.tzinfo is None:
-            end_time = end_time.replace(tzinfo=pytz.timezone(user_tz))
+            end_time = end_time.replace(tzinfo=self._get_user_tz())
             
         event = {
             'summary': summary,
@@ -350,6 +552,7 @@ class MeetingScheduler:
                 body=event,
                 sendUpdates=send_updates
             ).execute()
+            self._invalidate_busy_cache()
             logger.info(f"Meeting scheduled: {summary} on {start_time}")
             return event
         except Exception as e:
@@ -384,38 +587,8 @@ class MeetingScheduler:
             
             events = events_result.get('items', [])
             
-            # Format events for display
-            formatted_events = []
-            for event in events:
-                start = event.get('start', {}).get('dateTime', event.get('start', {}).get('date', 'Unknown'))
-                end = event.get('end', {}).get('dateTime', event.get('end', {}).get('date', 'Unknown'))
-                
-                # Convert to datetime objects if possible
-                try:
-                    if 'T' in start:  # This is a dateTime string
-                        start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                        start = start_dt.strftime("%Y-%m-%d %I:%M %p")
-                except Exception as e:
-                    logger.warning(f"Error parsing start time: {e}")
-                    
-                try:
-                    if 'T' in end:  # This is a dateTime string
-                        end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                        end = end_dt.strftime("%Y-%m-%d %I:%M %p")
-                except Exception as e:
-                    logger.warning(f"Error parsing end time: {e}")
-                
-                formatted_events.append({
-                    'id': event['id'],
-                    'summary': event.get('summary', 'No Title'),
-                    'start': start,
-                    'end': end,
-                    'attendees': event.get('attendees', []),
-                    'location': event.get('location', ''),
-                    'description': event.get('description', '')
-                })
-                
-            return formatted_events
+            # Format events for display, never more than max_results of them
+            return [meeting.to_dict() for meeting in islice(map(_format_event, events), max_results)]
             
         except Exception as e:
             logger.error(f"Error retrieving upcoming meetings: {e}")
@@ -468,7 +641,7 @@ class MeetingScheduler:
                 
             if start_time:
                 if start_time.tzinfo is None:
-                    start_time = start_time.replace(tzinfo=pytz.timezone(user_tz))
+                    start_time = start_time.replace(tzinfo=self._get_user_tz())
                 event['start'] = {
                     'dateTime': start_time.isoformat(),
                     'timeZone': user_tz
@@ -476,7 +649,7 @@ class MeetingScheduler:
                 
             if end_time:
                 if end_time.tzinfo is None:
-                    end_time = end_time.replace(tzinfo=pytz.timezone(user_tz))
+                    end_time = end_time.replace(tzinfo=self._get_user_tz())
                 event['end'] = {
                     'dateTime': end_time.isoformat(),
                     'timeZone': user_tz
@@ -484,13 +657,7 @@ class MeetingScheduler:
                 
             if attendees:
                 # Validate email addresses
-                valid_attendees = []
-                for email in attendees:
-                    # Basic email validation
-                    if '@' in email and '.' in email.split('@')[1]:
-                        valid_attendees.append(email)
-                    else:
-                        logger.warning(f"Invalid email address: {email}")
+                valid_attendees = _filter_valid_emails(attendees)
                 
                 if valid_attendees:
                     event['attendees'] = [{'email': email} for email in valid_attendees]
@@ -504,6 +671,7 @@ class MeetingScheduler:
                 sendUpdates=send_updates_value
             ).execute()
             
+            self._invalidate_busy_cache()
             logger.info(f"Meeting updated: {updated_event.get('summary')}")
             return updated_event
             
@@ -542,6 +710,7 @@ class MeetingScheduler:
                 sendUpdates=send_updates
             ).execute()
             
+            self._invalidate_busy_cache()
             logger.info(f"Meeting cancelled: {event_id}")
             return True
             
@@ -4,6 +4,8 @@ Simple email sender module that provides straightforward functions to send email
 
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import smtplib
 from email.mime.text import MIMEText
@@ -20,6 +22,131 @@ logger = logging.getLogger("simple_email_sender")
 # Load environment variables
 load_dotenv()
 
+# Background senders for send_simple_email_async; each worker thread keeps its own SMTP session
+_SEND_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("SMTP_POOL", "4")),
+    thread_name_prefix="smtp-sender"
+)
+_worker_state = threading.local()
+
+def _get_smtp_settings():
+    """Read the SMTP server, port, username and password from environment variables."""
+    return (
+        os.environ.get("SMTP_SERVER", "smtp.gmail.com"),
+        int(os.environ.get("SMTP_PORT", 587)),
+        os.environ.get("SMTP_USERNAME", ""),
+        os.environ.get("SMTP_PASSWORD", "")
+    )
+
+def _create_message(recipient_email, message_body, subject, sender_name, smtp_username):
+    """Build a plain-text MIME message with a display-name From header."""
+    message = MIMEMultipart()
+    message["To"] = recipient_email
+    
+    # Format the From header with display name
+    message["From"] = formataddr((sender_name, smtp_username))
+    message["Subject"] = subject
+    
+    # Attach message body
+    message.attach(MIMEText(message_body, "plain"))
+    return message
+
+class SMTPSession:
+    """
+    Authenticated SMTP connection that can be reused for many sends.
+    
+    Opening the connection (STARTTLS + login) is the slow part of sending,
+    so batch senders should keep one session open:
+    
+        with SMTPSession() as session:
+            for recipient, body in replies:
+                session.send_email(recipient, body)
+    """
+    
+    def __init__(self):
+        self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password = _get_smtp_settings()
+        self.server = None
+    
+    def __enter__(self):
+        if not self.smtp_username or not self.smtp_password:
+            raise ValueError("SMTP credentials not found. Set SMTP_USERNAME and SMTP_PASSWORD in .env file.")
+        self._connect()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _connect(self):
+        """Open, secure and authenticate a new connection."""
+        self.close()
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        try:
+            server.starttls()  # Secure the connection
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            # Never keep a half-open connection: NOOP would pass and every send would fail with 530
+            server.close()
+            raise
+        self.server = server
+    
+    def _ensure_connected(self):
+        """Reconnect if the server dropped the connection since the last send."""
+        try:
+            if self.server is None or self.server.noop()[0] != 250:
+                self._connect()
+        except smtplib.SMTPServerDisconnected:
+            self._connect()
+    
+    def close(self):
+        """Close the connection if it is open."""
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            finally:
+                self.server = None
+    
+    def send(self, message):
+        """
+        Send an already-built message over the session connection.
+        
+        Args:
+            message (email.message.Message): The message to send
+        """
+        self._ensure_connected()
+        try:
+            self.server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed the connection between the keepalive and the send
+            self._connect()
+            self.server.send_message(message)
+    
+    def send_email(self, recipient_email, message_body, subject="Email from AI Assistant", sender_name="AI Email Assistant"):
+        """
+        Send a simple email over the session connection.
+        
+        Args:
+            recipient_email (str): The recipient's email address
+            message_body (str): The message content
+            subject (str, optional): Email subject line. Default is "Email from AI Assistant"
+            sender_name (str, optional): Display name for the sender. Default is "AI Email Assistant"
+            
+        Returns:
+            bool: True if successful, False if failed
+        """
+        try:
+            message = _create_message(recipient_email, message_body, subject, sender_name, self.smtp_username)
+            self.send(message)
+            logger.info(f"Email sent successfully to {recipient_email}")
+            return True
+        except smtplib.SMTPException as smtp_err:
+            logger.error(f"SMTP error: {smtp_err}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to send email: {e}")
+            return False
+
 def send_simple_email(recipient_email, message_body, subject="Email from AI Assistant", sender_name="AI Email Assistant"):
     """
     Send a simple email to the specified recipient.
@@ -34,45 +161,73 @@ def send_simple_email(recipient_email, message_body, subject="Email from AI Assi
     Returns:
         bool: True if successful, False if failed
     """
-    # Get SMTP settings from environment variables
-    smtp_server = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.environ.get("SMTP_PORT", 587))
-    smtp_username = os.environ.get("SMTP_USERNAME", "")
-    smtp_password = os.environ.get("SMTP_PASSWORD", "")
+    return send_many([(recipient_email, message_body, subject, sender_name)])[0]
+
+def send_many(emails):
+    """
+    Send several emails over a single SMTP connection.
+    
+    Args:
+        emails (list): Tuples of (recipient_email, message_body[, subject[, sender_name]])
+        
+    Returns:
+        list: One bool per email, True if that email was sent
+    """
+    emails = list(emails)
+    if not emails:
+        return []
+    _, _, smtp_username, smtp_password = _get_smtp_settings()
     
     # Validate SMTP settings
     if not smtp_username or not smtp_password:
         logger.error("SMTP credentials not found. Set SMTP_USERNAME and SMTP_PASSWORD in .env file.")
-        return False
+        return [False] * len(emails)
     
     try:
-        # Create message
-        message = MIMEMultipart()
-        message["To"] = recipient_email
-        
-        # Format the From header with display name
-        message["From"] = formataddr((sender_name, smtp_username))
-        message["Subject"] = subject
-        
-        # Attach message body
-        message.attach(MIMEText(message_body, "plain"))
-        
-        # Connect to SMTP server and send
-        try:
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=30) as server:
-                server.starttls()  # Secure the connection
-                server.login(smtp_username, smtp_password)
-                server.send_message(message)
-            
-            logger.info(f"Email sent successfully to {recipient_email}")
-            return True
-        except smtplib.SMTPException as smtp_err:
-            logger.error(f"SMTP error: {smtp_err}")
-            return False
-        
+        with SMTPSession() as session:
+            return [session.send_email(*email) for email in emails]
+    except smtplib.SMTPException as smtp_err:
+        logger.error(f"SMTP error: {smtp_err}")
     except Exception as e:
         logger.error(f"Failed to send email: {e}")
-        return False
+    return [False] * len(emails)
+
+def _send_with_worker_session(recipient_email, message_body, subject, sender_name):
+    """Send on the current pool thread's persistent SMTP session, opening it on first use."""
+    session = getattr(_worker_state, "session", None)
+    if session is None:
+        session = SMTPSession()
+        if not session.smtp_username or not session.smtp_password:
+            logger.error("SMTP credentials not found. Set SMTP_USERNAME and SMTP_PASSWORD in .env file.")
+            return False
+        _worker_state.session = session
+    return session.send_email(recipient_email, message_body, subject, sender_name)
+
+def _log_send_failure(recipient_email):
+    """Build a done-callback that logs a failed background send."""
+    def callback(future):
+        if future.exception() is not None:
+            logger.error(f"Background email to {recipient_email} failed: {future.exception()}")
+        elif not future.result():
+            logger.error(f"Background email to {recipient_email} was not sent")
+    return callback
+
+def send_simple_email_async(recipient_email, message_body, subject="Email from AI Assistant", sender_name="AI Email Assistant"):
+    """
+    Queue a simple email for sending on a background thread and return immediately.
+    
+    Args:
+        recipient_email (str): The recipient's email address
+        message_body (str): The message content
+        subject (str, optional): Email subject line. Default is "Email from AI Assistant"
+        sender_name (str, optional): Display name for the sender. Default is "AI Email Assistant"
+        
+    Returns:
+        concurrent.futures.Future: Resolves to True if successful, False if failed
+    """
+    future = _SEND_POOL.submit(_send_with_worker_session, recipient_email, message_body, subject, sender_name)
+    future.add_done_callback(_log_send_failure(recipient_email))
+    return future
 
 def send_reply_email(recipient_email, message_body, subject="Re: Email from AI Assistant", sender_name="AI Email Assistant"):
     """
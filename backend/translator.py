@@ -1,48 +1,350 @@
 import google.generativeai as genai
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator, Mapping, Sequence
+from types import MappingProxyType
 import os
+import asyncio
 import logging
 from dotenv import load_dotenv
 from langdetect import detect
+from utils.llm_cache import CACHE, llm_cached, method_key
+from cachetools import LRUCache
+from google.api_core.exceptions import ResourceExhausted, DeadlineExceeded
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import hashlib
+import threading
+import json
 import re
 
+try:
+    import fasttext
+except ImportError:  # Optional: langdetect is used when fasttext isn't installed
+    fasttext = None
+
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
+# Translation and detection results, shared by all translator instances so they
+# survive Streamlit reruns. Keys use a hash of the text, never the text itself.
+_translation_cache = LRUCache(maxsize=4096)
+_language_cache = LRUCache(maxsize=4096)
+_cache_lock = threading.Lock()
+
+# Batched translations come back as a JSON array, possibly wrapped in prose or code fences
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# Rough input budget per batched prompt (~6k tokens at ~4 characters per token)
+_BATCH_CHAR_BUDGET = 24_000
+
+# Bump whenever the translation prompt changes so persisted translations are not reused
+_TRANSLATION_PROMPT_VERSION = "1"
+
+# Upper bound on concurrent Gemini requests from the async path, to stay inside the per-minute quota
+_MAX_CONCURRENT_REQUESTS = 8
+
+# langdetect is unreliable below this many characters, so shorter strings are not detected on their own
+_MIN_DETECT_CHARS = 20
+
+# Read-only so the shared entries can be handed out without copying
+_LANGUAGES = tuple(MappingProxyType(lang) for lang in (
+    {'code': 'en', 'name': 'English'},
+    {'code': 'es', 'name': 'Spanish'},
+    {'code': 'fr', 'name': 'French'},
+    {'code': 'de', 'name': 'German'},
+    {'code': 'it', 'name': 'Italian'},
+    {'code': 'pt', 'name': 'Portuguese'},
+    {'code': 'ru', 'name': 'Russian'},
+    {'code': 'zh', 'name': 'Chinese'},
+    {'code': 'ja', 'name': 'Japanese'},
+    {'code': 'ko', 'name': 'Korean'},
+    {'code': 'ar', 'name': 'Arabic'},
+    {'code': 'hi', 'name': 'Hindi'}
+))
+_LANG_CODE_TO_NAME = {lang['code']: lang['name'] for lang in _LANGUAGES}
+
+# A run of consecutive "> " quoted lines, i.e. history repeated across replies in a thread
+_QUOTE_RE = re.compile(r'(?m)^(?:>.*(?:\n|$))+')
+
+# Longest server-requested Retry-After delay that is honored before giving up on the wait
+_MAX_RETRY_AFTER_SECONDS = 60
+
+_backoff = wait_exponential(multiplier=2, min=2, max=30)
+
+def _wait_for_retry(retry_state) -> float:
+    """Wait as long as a 429 response's Retry-After header asks, else back off exponentially."""
+    error = retry_state.outcome.exception()
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    retry_after = headers.get('retry-after')
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), _MAX_RETRY_AFTER_SECONDS)
+        except ValueError:
+            pass
+    return _backoff(retry_state)
+
+# Transient Gemini quota and timeout errors are retried; anything else fails immediately
+_retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=_wait_for_retry,
+    retry=retry_if_exception_type((ResourceExhausted, DeadlineExceeded)),
+    reraise=True
+)
+
+def _split_quoted(body: str) -> List[str]:
+    """Split a body into alternating new-text and quoted segments that join back to the body."""
+    segments = []
+    last = 0
+    for match in _QUOTE_RE.finditer(body):
+        if match.start() > last:
+            segments.append(body[last:match.start()])
+        segments.append(match.group(0))
+        last = match.end()
+    if last < len(body):
+        segments.append(body[last:])
+    return segments or [body]
+
+def _join_segments(originals: List[str], translations: List[str]) -> str:
+    """Reassemble translated segments, restoring line breaks the model trimmed at segment ends."""
+    return "".join(
+        translated + "\n" if original.endswith("\n") and not translated.endswith("\n") else translated
+        for original, translated in zip(originals, translations)
+    )
+
+def _text_key(text: str) -> str:
+    """Fixed-size cache key for a piece of text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
 class EmailTranslator:
+    # fasttext language-ID model, loaded on first use and shared by all instances
+    _lid_model = None
+    _lid_loaded = False
+    _lid_lock = threading.Lock()
+    
+    # Gemini model, configured once and shared by all instances across Streamlit reruns
+    _model = None
+    _model_lock = threading.Lock()
+    
     def __init__(self):
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
+        with EmailTranslator._model_lock:
+            if EmailTranslator._model is None:
+                genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+                EmailTranslator._model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
+        self.model = EmailTranslator._model
+        # Async translations currently running, so concurrent requests for the same text share one call
+        self._inflight: Dict[tuple, asyncio.Task] = {}
 
     def detect_language(self, text: str) -> str:
         """Detect the language of the text."""
+        cache_key = _text_key(text)
+        with _cache_lock:
+            language = _language_cache.get(cache_key)
+        if language is not None:
+            return language
         try:
-            return detect(text)
+            language = self._detect_with_fasttext(text) or detect(text)
+            with _cache_lock:
+                _language_cache[cache_key] = language
+            return language
         except Exception as e:
             logging.error(f"Error detecting language: {e}")
             return "en"  # Default to English
     
-    def translate_text(self, text: str, target_language: str) -> str:
-        """Translate text to target language using Gemini."""
+    @classmethod
+    def _get_lid_model(cls):
+        """Load the fasttext lid.176 model once, or return None if it isn't available."""
+        if not cls._lid_loaded:
+            with cls._lid_lock:
+                if not cls._lid_loaded:
+                    model_path = os.getenv('FASTTEXT_LID_MODEL', 'lid.176.ftz')
+                    if fasttext is not None and os.path.exists(model_path):
+                        try:
+                            cls._lid_model = fasttext.load_model(model_path)
+                        except Exception as e:
+                            logging.error(f"Error loading fasttext language model: {e}")
+                    cls._lid_loaded = True
+        return cls._lid_model
+    
+    def _detect_with_fasttext(self, text: str) -> Optional[str]:
+        """Detect the language with fasttext, or return None to fall back to langdetect."""
+        model = self._get_lid_model()
+        if model is None:
+            return None
         try:
-            # Get language name for the target language code
-            language_name = next((lang['name'] for lang in self.get_supported_languages() 
-                                 if lang['code'] == target_language), target_language)
-            
-            prompt = f"""Translate the following text to {language_name}. 
-            Maintain the original tone and formatting.
-            
-            Text:
-            {text}
-            
-            Translation:"""
+            # fasttext predicts one line at a time
+            labels, _ = model.predict(text.replace("\n", " "), k=1)
+        except Exception as e:
+            # e.g. fasttext 0.9.x under NumPy 2; stop trying it and use langdetect from now on
+            logging.error(f"Error detecting language with fasttext, falling back to langdetect: {e}")
+            EmailTranslator._lid_model = None
+            return None
+        return labels[0].replace("__label__", "") if labels else None
+    
+    def translate_text(self, text: str, target_language: str,
+                       source_language: Optional[str] = None) -> str:
+        """Translate text to target language using Gemini.
+        
+        Args:
+            text: Text to translate
+            target_language: Language code to translate into
+            source_language: Detected language of the surrounding email, used for short strings
             
-            response = self.model.generate_content(prompt)
-            return response.text
+        Returns:
+            Translated text, or the original text if it is already in the target language
+        """
+        if self._is_target_language(text, target_language, source_language):
+            return text
+        # The target language is part of the key so switching languages never returns a stale result
+        cache_key = (_text_key(text), target_language)
+        with _cache_lock:
+            translated = _translation_cache.get(cache_key)
+        if translated is not None:
+            return translated
+        try:
+            translated = self._generate_translation(text, target_language)
+            with _cache_lock:
+                _translation_cache[cache_key] = translated
+            return translated
         except Exception as e:
             logging.error(f"Error translating text: {e}")
             return text
     
+    @llm_cached(_TRANSLATION_PROMPT_VERSION, namespace='translation')
+    def _generate_translation(self, text: str, target_language: str) -> str:
+        """Translate text with Gemini, reusing translations persisted by earlier runs."""
+        return "".join(self.stream_translation(text, target_language))
+    
+    @llm_cached(_TRANSLATION_PROMPT_VERSION, namespace='translation')
+    async def _generate_translation_async(self, text: str, target_language: str) -> str:
+        """Async counterpart of _generate_translation, sharing its persisted translations."""
+        return "".join([
+            chunk async for chunk in self.stream_translation_async(text, target_language)
+        ])
+    
+    @_retry_transient
+    def _generate(self, prompt: str, **kwargs):
+        """Call Gemini, retrying rate-limit and deadline errors."""
+        return self.model.generate_content(prompt, **kwargs)
+    
+    @_retry_transient
+    async def _generate_async(self, prompt: str, **kwargs):
+        """Async counterpart of _generate."""
+        return await self.model.generate_content_async(prompt, **kwargs)
+    
+    def stream_translation(self, text: str, target_language: str) -> Iterator[str]:
+        """Yield the translation of text piece by piece while Gemini is still generating it."""
+        response = self._generate(self._translation_prompt(text, target_language), stream=True)
+        for chunk in response:
+            yield chunk.text
+    
+    async def stream_translation_async(self, text: str, target_language: str) -> AsyncIterator[str]:
+        """Async counterpart of stream_translation."""
+        response = await self._generate_async(self._translation_prompt(text, target_language), stream=True)
+        async for chunk in response:
+            yield chunk.text
+    
+    def translate_batch(self, texts: List[str], target_language: str,
+                        source_languages: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+        """Translate several texts with as few Gemini calls as possible, keeping their order.
+        
+        Args:
+            texts: Texts to translate
+            target_language: Language code to translate into
+            source_languages: Detected language of the email each text came from, used for short strings
+            
+        Returns:
+            Translations in input order; blank texts and texts already in the target language are unchanged
+        """
+        results = list(texts)
+        source_languages = source_languages or [None] * len(texts)
+        
+        # Group positions by text so repeated strings are translated once; skip blanks and cache hits
+        pending: Dict[str, List[int]] = {}
+        for index, (text, source_language) in enumerate(zip(texts, source_languages)):
+            if not text or not text.strip() or self._is_target_language(text, target_language, source_language):
+                continue
+            if text in pending:
+                pending[text].append(index)
+                continue
+            with _cache_lock:
+                translated = _translation_cache.get((_text_key(text), target_language))
+            if translated is None:
+                # Translations persisted by earlier runs, shared with _generate_translation
+                translated = CACHE.get(self._persisted_key(text, target_language))
+                if translated is not None:
+                    with _cache_lock:
+                        _translation_cache[(_text_key(text), target_language)] = translated
+            if translated is not None:
+                results[index] = translated
+            else:
+                pending[text] = [index]
+        
+        for chunk in self._chunk_for_prompt(list(pending)):
+            for text, translated in zip(chunk, self._translate_chunk(chunk, target_language)):
+                for index in pending[text]:
+                    results[index] = translated
+        
+        return results
+    
+    def _persisted_key(self, text: str, target_language: str) -> str:
+        """Persistent cache key of a translation, the same one _generate_translation uses."""
+        return method_key('translation', self, _TRANSLATION_PROMPT_VERSION, text, target_language)
+    
+    def _chunk_for_prompt(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into groups that each fit the batched prompt budget."""
+        chunks = []
+        current = []
+        current_size = 0
+        for text in texts:
+            if current and current_size + len(text) > _BATCH_CHAR_BUDGET:
+                chunks.append(current)
+                current = []
+                current_size = 0
+            current.append(text)
+            current_size += len(text)
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _translate_chunk(self, texts: List[str], target_language: str) -> List[str]:
+        """Translate one group of texts in a single call.
+        
+        A reply that can't be matched up with the inputs falls back to one call per text.
+        If the API itself fails (after retries for quota and timeout errors) the texts are
+        returned untranslated, since more calls would only hit the same failure.
+        """
+        prompt = (
+            f"Translate each item in this JSON array to {_LANG_CODE_TO_NAME.get(target_language, target_language)}. "
+            "Maintain the original tone and formatting of every item. "
+            "Return only a JSON array of the same length, preserving order.\n"
+            f"Input: {json.dumps(texts, ensure_ascii=False)}"
+        )
+        
+        # The model occasionally merges or drops items, so a length mismatch gets one retry
+        for attempt in range(2):
+            try:
+                response = self._generate(prompt)
+            except Exception as e:
+                logging.error(f"Error translating batch, leaving {len(texts)} texts untranslated: {e}")
+                return list(texts)
+            try:
+                match = _JSON_ARRAY_RE.search(response.text)
+                translated = json.loads(match.group(0)) if match else []
+            except ValueError as e:
+                # Unparseable reply (or a blocked response without text)
+                logging.error(f"Error parsing batch translation: {e}")
+                break
+            
+            if isinstance(translated, list) and len(translated) == len(texts):
+                translated = [str(item) for item in translated]
+                with _cache_lock:
+                    for text, item in zip(texts, translated):
+                        _translation_cache[(_text_key(text), target_language)] = item
+                for text, item in zip(texts, translated):
+                    CACHE.set(self._persisted_key(text, target_language), item)
+                return translated
+            logging.warning(f"Batch translation returned {len(translated) if isinstance(translated, list) else 0} items for {len(texts)} inputs")
+        
+        return [self.translate_text(text, target_language) for text in texts]
+    
     def translate_email(self, email: Dict[str, Any], target_language: str) -> Dict[str, Any]:
         """Translate an entire email to target language."""
         try:
@@ -52,9 +354,10 @@ class EmailTranslator:
             if original_language == target_language:
                 return email
             
-            # Translate subject and body
-            translated_subject = self.translate_text(email['subject'], target_language)
-            translated_body = self.translate_text(email['body'], target_language)
+            # Translate subject and body in one call
+            translated_subject, translated_body = self.translate_batch(
+                [email['subject'], email['body']], target_language, [original_language] * 2
+            )
             
             return {
                 **email,
@@ -70,11 +373,32 @@ class EmailTranslator:
     def translate_thread(self, thread: Dict[str, Any], target_language: str) -> Dict[str, Any]:
         """Translate an entire email thread to target language."""
         try:
-            translated_messages = []
+            messages = thread['messages']
+            languages = [self.detect_language(message['body']) for message in messages]
+            
+            # Translate every subject and body that isn't already in the target language in one batch.
+            # Bodies are split at quoted history, so text quoted by several replies is sent once.
+            foreign = [index for index, language in enumerate(languages) if language != target_language]
+            body_segments = [_split_quoted(messages[index]['body']) for index in foreign]
+            translated = self.translate_batch(
+                [messages[index]['subject'] for index in foreign] +
+                [segment for segments in body_segments for segment in segments],
+                target_language,
+                [languages[index] for index in foreign] +
+                [languages[index] for index, segments in zip(foreign, body_segments) for _ in segments]
+            )
             
-            for message in thread['messages']:
-                translated_message = self.translate_email(message, target_language)
-                translated_messages.append(translated_message)
+            translated_messages = list(messages)
+            offset = len(foreign)
+            for position, (index, segments) in enumerate(zip(foreign, body_segments)):
+                translated_messages[index] = {
+                    **messages[index],
+                    'subject': translated[position],
+                    'body': _join_segments(segments, translated[offset:offset + len(segments)]),
+                    'original_language': languages[index],
+                    'translated_language': target_language
+                }
+                offset += len(segments)
             
             return {
                 **thread,
@@ -84,22 +408,108 @@ class EmailTranslator:
             logging.error(f"Error translating thread: {e}")
             return thread
     
-    def get_supported_languages(self) -> List[Dict[str, str]]:
-        """Get list of supported languages."""
-        return [
-            {'code': 'en', 'name': 'English'},
-            {'code': 'es', 'name': 'Spanish'},
-            {'code': 'fr', 'name': 'French'},
-            {'code': 'de', 'name': 'German'},
-            {'code': 'it', 'name': 'Italian'},
-            {'code': 'pt', 'name': 'Portuguese'},
-            {'code': 'ru', 'name': 'Russian'},
-            {'code': 'zh', 'name': 'Chinese'},
-            {'code': 'ja', 'name': 'Japanese'},
-            {'code': 'ko', 'name': 'Korean'},
-            {'code': 'ar', 'name': 'Arabic'},
-            {'code': 'hi', 'name': 'Hindi'}
-        ]
+    async def _translate_text_async(self, text: str, target_language: str,
+                                    semaphore: asyncio.Semaphore,
+                                    source_language: Optional[str] = None) -> str:
+        """Translate text to target language without blocking the event loop."""
+        if self._is_target_language(text, target_language, source_language):
+            return text
+        cache_key = (_text_key(text), target_language)
+        with _cache_lock:
+            translated = _translation_cache.get(cache_key)
+        if translated is not None:
+            return translated
+        
+        # Join a translation of the same text that is already in flight instead of calling Gemini again
+        task = self._inflight.get(cache_key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch_translation_async(text, target_language, semaphore))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(cache_key, None)
+                                   if self._inflight.get(cache_key) is done else None)
+        # Shielded so one cancelled caller doesn't cancel the call other callers are waiting on
+        return await asyncio.shield(task)
+    
+    async def _fetch_translation_async(self, text: str, target_language: str,
+                                       semaphore: asyncio.Semaphore) -> str:
+        """Translate text with Gemini and remember the result, returning the text itself on error."""
+        try:
+            async with semaphore:
+                translated = await self._generate_translation_async(text, target_language)
+            with _cache_lock:
+                _translation_cache[(_text_key(text), target_language)] = translated
+            return translated
+        except Exception as e:
+            logging.error(f"Error translating text: {e}")
+            return text
+    
+    async def translate_email_async(self, email: Dict[str, Any], target_language: str,
+                                    semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
+        """Translate an email's subject and body concurrently."""
+        semaphore = semaphore or asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        try:
+            # Detect original language
+            original_language = self.detect_language(email['body'])
+            
+            # Skip translation if already in target language
+            if original_language == target_language:
+                return email
+            
+            translated_subject, translated_body = await asyncio.gather(
+                self._translate_text_async(email['subject'], target_language, semaphore, original_language),
+                self._translate_text_async(email['body'], target_language, semaphore, original_language)
+            )
+            
+            return {
+                **email,
+                'subject': translated_subject,
+                'body': translated_body,
+                'original_language': original_language,
+                'translated_language': target_language
+            }
+        except Exception as e:
+            logging.error(f"Error translating email: {e}")
+            return email
+    
+    async def translate_thread_async(self, thread: Dict[str, Any], target_language: str) -> Dict[str, Any]:
+        """Translate every message of a thread concurrently."""
+        try:
+            # One semaphore per call, since asyncio primitives are bound to the running loop
+            semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+            translated_messages = await asyncio.gather(*[
+                self.translate_email_async(message, target_language, semaphore)
+                for message in thread['messages']
+            ])
+            
+            return {
+                **thread,
+                'messages': list(translated_messages)
+            }
+        except Exception as e:
+            logging.error(f"Error translating thread: {e}")
+            return thread
+    
+    def _is_target_language(self, text: str, target_language: str,
+                            source_language: Optional[str] = None) -> bool:
+        """Check whether text is already in the target language and needs no API call."""
+        if len(text.strip()) >= _MIN_DETECT_CHARS:
+            return self.detect_language(text) == target_language
+        # Too short to detect reliably, so trust the language of the surrounding email instead
+        return source_language == target_language
+    
+    def _translation_prompt(self, text: str, target_language: str) -> str:
+        """Build the single-text translation prompt."""
+        return f"""Translate the following text to {_LANG_CODE_TO_NAME.get(target_language, target_language)}. 
+            Maintain the original tone and formatting.
+            
+            Text:
+            {text}
+            
+            Translation:"""
+    
+    def get_supported_languages(self) -> Sequence[Mapping[str, str]]:
+        """Get the supported languages as read-only code/name mappings."""
+        return _LANGUAGES
     
     def format_translation(self, original: str, translated: str, 
                           original_lang: str, target_lang: str) -> str:
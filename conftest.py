@@ -0,0 +1,24 @@
+import pytest
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+@pytest.fixture(scope="session")
+def gmail_auth():
+    """Gmail service and credentials, authorized once per test session (per worker under xdist)."""
+    from utils.auth import get_gmail_service
+    try:
+        return get_gmail_service()
+    except Exception as e:
+        pytest.skip(f"Gmail authentication unavailable: {e}")
+
+@pytest.fixture(scope="session")
+def gmail_service(gmail_auth):
+    """Authorized Gmail API service."""
+    return gmail_auth[0]
+
+@pytest.fixture(scope="session")
+def gmail_creds(gmail_auth):
+    """Credentials shared by the Gmail and Calendar APIs."""
+    return gmail_auth[1]
@@ -1,12 +1,33 @@
 import os
+import asyncio
+import json
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
-from typing import Dict, Any, Optional
+import threading
+from cachetools import TTLCache, cached
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
+from utils.llm_cache import llm_cached
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
+# Outermost JSON object in a response that wraps it in prose or code fences
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Installed models rarely change, so /api/tags results are reused for a minute
+_avail_cache = TTLCache(maxsize=4, ttl=60)
+_avail_lock = threading.Lock()
+
+# Bump whenever the analysis prompt changes so persisted analyses are not reused
+_ANALYSIS_PROMPT_VERSION = "1"
+
+# Seconds without any pull progress before the pull is treated as stuck
+_PULL_STALL_TIMEOUT = 120
+
 class OllamaClient:
     """Client for interacting with Ollama API."""
     
@@ -15,11 +36,28 @@ class OllamaClient:
         self.host = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
         self.model = os.getenv('OLLAMA_MODEL', 'llama2')
         self.api_base = f"{self.host}/api"
+        self.session = self._create_session()
+    
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session that retries transient Ollama errors with backoff."""
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
         
+    @cached(_avail_cache, key=lambda self: (self.host, self.model), lock=_avail_lock)
     def check_model_availability(self) -> bool:
         """Check if the specified model is available in Ollama."""
         try:
-            response = requests.get(f"{self.api_base}/tags")
+            response = self.session.get(f"{self.api_base}/tags")
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 for model in models:
@@ -38,33 +76,67 @@ class OllamaClient:
                 return True
                 
             logging.info(f"Pulling model {self.model}...")
-            response = requests.post(
+            # Ollama streams NDJSON progress; the read timeout fails a pull that stops reporting
+            with self.session.post(
                 f"{self.api_base}/pull",
-                json={"name": self.model}
-            )
+                json={"name": self.model, "stream": True},
+                stream=True,
+                timeout=(10, _PULL_STALL_TIMEOUT)
+            ) as response:
+                if response.status_code != 200:
+                    logging.error(f"Failed to pull model: {response.text}")
+                    return False
+                
+                last_status = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get('error'):
+                        logging.error(f"Failed to pull model: {event['error']}")
+                        return False
+                    # Download progress repeats the same status many times; log each stage once
+                    status = event.get('status')
+                    if status != last_status:
+                        logging.info(f"Pulling {self.model}: {status}")
+                        last_status = status
             
-            if response.status_code == 200:
-                logging.info(f"Successfully pulled model {self.model}")
-                return True
-            else:
-                logging.error(f"Failed to pull model: {response.text}")
-                return False
+            logging.info(f"Successfully pulled model {self.model}")
+            with _avail_lock:
+                _avail_cache.clear()
+            return True
         except Exception as e:
             logging.error(f"Error pulling model: {e}")
             return False
     
-    def generate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> Optional[str]:
-        """Generate text using Ollama model."""
+    def generate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 500,
+                      format: Optional[str] = None) -> Optional[str]:
+        """Generate text using Ollama model.
+        
+        Args:
+            prompt: Prompt to send to the model
+            temperature: Sampling temperature
+            max_tokens: Maximum number of tokens to generate
+            format: Optional output format, e.g. "json" to force valid JSON
+            
+        Returns:
+            Generated text, or None on error
+        """
         try:
-            response = requests.post(
-                f"{self.api_base}/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
+            # Sampling settings belong under "options"; Ollama ignores them at the top level
+            payload = {
+                "model": self.model,
+                "prompt": prompt,
+                "stream": False,
+                "options": {
                     "temperature": temperature,
-                    "max_tokens": max_tokens
+                    "num_predict": max_tokens
                 }
-            )
+            }
+            if format:
+                payload["format"] = format
+            
+            response = self.session.post(f"{self.api_base}/generate", json=payload)
             
             if response.status_code == 200:
                 return response.json().get('response', '')
@@ -77,6 +149,28 @@ class OllamaClient:
     
     def analyze_email(self, email_content: str) -> Dict[str, Any]:
         """Analyze email content using Ollama model."""
+        try:
+            result = self._request_analysis(email_content)
+            if not result:
+                return {
+                    "summary": "Failed to analyze email.",
+                    "sentiment": "neutral",
+                    "urgency": "medium",
+                    "key_points": []
+                }
+            return result
+        except Exception as e:
+            logging.error(f"Error analyzing email: {e}")
+            return {
+                "summary": "Error analyzing email.",
+                "sentiment": "neutral",
+                "urgency": "medium",
+                "key_points": []
+            }
+    
+    @llm_cached(_ANALYSIS_PROMPT_VERSION)
+    def _request_analysis(self, email_content: str) -> Optional[Dict[str, Any]]:
+        """Ask Ollama for a JSON analysis, reusing analyses persisted by earlier runs."""
         prompt = f"""
         Analyze the following email content and provide:
         1. A brief summary (2-3 sentences)
@@ -96,58 +190,36 @@ class OllamaClient:
         }}
         """
         
+        response = self.generate_text(prompt, format="json")
+        if not response:
+            return None
+        
+        # JSON mode returns a bare document; servers that ignore "format" may wrap it in text
         try:
-            response = self.generate_text(prompt)
-            if not response:
-                return {
-                    "summary": "Failed to analyze email.",
-                    "sentiment": "neutral",
-                    "urgency": "medium",
-                    "key_points": []
-                }
-            
-            # Extract JSON from response
-            import json
-            import re
-            
-            # Find JSON pattern in the response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    logging.error("Failed to parse JSON from response")
-            
-            # Fallback to basic extraction
-            lines = response.strip().split('\n')
-            result = {
-                "summary": "",
-                "sentiment": "neutral",
-                "urgency": "medium",
-                "key_points": []
-            }
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith("summary:") or line.startswith("Summary:"):
-                    result["summary"] = line.split(":", 1)[1].strip()
-                elif line.startswith("sentiment:") or line.startswith("Sentiment:"):
-                    result["sentiment"] = line.split(":", 1)[1].strip().lower()
-                elif line.startswith("urgency:") or line.startswith("Urgency:"):
-                    result["urgency"] = line.split(":", 1)[1].strip().lower()
-                elif line.startswith("-") or line.startswith("*"):
-                    result["key_points"].append(line[1:].strip())
+            return json.loads(response)
+        except json.JSONDecodeError:
+            json_match = _JSON_RE.search(response)
+            if not json_match:
+                raise
+            return json.loads(json_match.group(0))
+    
+    async def analyze_emails(self, contents: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Analyze several emails concurrently, returning results in input order.
+        
+        Args:
+            contents: Email contents to analyze
+            max_concurrency: Maximum number of requests in flight to the Ollama server
             
-            return result
-        except Exception as e:
-            logging.error(f"Error analyzing email: {e}")
-            return {
-                "summary": "Error analyzing email.",
-                "sentiment": "neutral",
-                "urgency": "medium",
-                "key_points": []
-            }
+        Returns:
+            One analysis dict per email, as returned by analyze_email
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze(content: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await asyncio.to_thread(self.analyze_email, content)
+        
+        return list(await asyncio.gather(*(analyze(content) for content in contents)))
 
 # Singleton instance
 ollama_client = OllamaClient() 
\ No newline at end of file
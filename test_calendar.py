@@ -1,103 +1,68 @@
 """
-Test script for calendar functionality.
-Run this script to test calendar integration directly.
+Tests for calendar functionality.
+Run this script (or pytest) to test calendar integration directly.
 """
 
-import os
+import sys
+import pytest
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 from backend.scheduler import MeetingScheduler
-from utils.auth import get_gmail_service
 
-# Load environment variables
-load_dotenv()
+# Every check here talks to the live Calendar API; see conftest.py for the shared Gmail fixtures
+pytestmark = pytest.mark.network
 
-def test_calendar_features():
-    print("Testing Calendar Features")
-    print("-" * 50)
-    
-    # Get gmail service and credentials
-    try:
-        gmail_service, gmail_creds = get_gmail_service()
-        print("✓ Successfully authenticated with Gmail API")
-    except Exception as e:
-        print(f"✗ Authentication failed: {e}")
-        return
+@pytest.fixture(scope="module")
+def scheduler(gmail_creds):
+    """Meeting scheduler built once for all calendar checks."""
+    return MeetingScheduler(gmail_creds)
+
+def test_upcoming_meetings(scheduler):
+    upcoming_meetings = scheduler.get_upcoming_meetings(max_results=5)
+    print(f"✓ Found {len(upcoming_meetings)} upcoming meetings")
     
-    # Initialize scheduler
-    try:
-        scheduler = MeetingScheduler(gmail_creds)
-        print("✓ Meeting scheduler initialized")
-    except Exception as e:
-        print(f"✗ Failed to initialize meeting scheduler: {e}")
-        return
+    if upcoming_meetings:
+        print("\nUpcoming meetings:")
+        for meeting in upcoming_meetings:
+            print(f"- {meeting['summary']} ({meeting['start']})")
+
+def test_available_slots(scheduler):
+    print("\nFinding available meeting slots...")
+    slots = scheduler.get_available_slots(days_ahead=3)
+    print(f"✓ Found {len(slots)} available slots")
     
-    # Test getting upcoming meetings
-    try:
-        upcoming_meetings = scheduler.get_upcoming_meetings(max_results=5)
-        print(f"✓ Found {len(upcoming_meetings)} upcoming meetings")
-        
-        if upcoming_meetings:
-            print("\nUpcoming meetings:")
-            for meeting in upcoming_meetings:
-                print(f"- {meeting['summary']} ({meeting['start']})")
-    except Exception as e:
-        print(f"✗ Failed to get upcoming meetings: {e}")
+    if slots:
+        print("\nAvailable slots:")
+        for i, slot in enumerate(slots[:3]):  # Show first 3 slots
+            print(f"- Option {i+1}: {slot['start']} ({slot['duration']})")
+
+@pytest.mark.skip(reason="Creates a real calendar event; run explicitly when needed")
+def test_schedule_and_cancel_meeting(scheduler, gmail_service):
+    print("\nAttempting to schedule a test meeting...")
+    # Schedule a meeting 1 day from now
+    start_time = datetime.now() + timedelta(days=1)
+    start_time = start_time.replace(hour=10, minute=0, second=0, microsecond=0)
+    end_time = start_time + timedelta(minutes=30)
     
-    # Test finding available slots
-    try:
-        print("\nFinding available meeting slots...")
-        slots = scheduler.get_available_slots(days_ahead=3)
-        print(f"✓ Found {len(slots)} available slots")
-        
-        if slots:
-            print("\nAvailable slots:")
-            for i, slot in enumerate(slots[:3]):  # Show first 3 slots
-                print(f"- Option {i+1}: {slot['start']} ({slot['duration']})")
-    except Exception as e:
-        print(f"✗ Failed to find available slots: {e}")
+    # Get the user's own email for testing
+    profile = gmail_service.users().getProfile(userId='me').execute()
+    user_email = profile.get('emailAddress', '')
+    assert user_email, "Could not get user email"
     
-    # Test scheduling a meeting (commented out to prevent accidental scheduling)
-    """
-    try:
-        print("\nAttempting to schedule a test meeting...")
-        # Schedule a meeting 1 day from now
-        start_time = datetime.now() + timedelta(days=1)
-        start_time = start_time.replace(hour=10, minute=0, second=0, microsecond=0)
-        end_time = start_time + timedelta(minutes=30)
-        
-        # Get the user's own email for testing
-        profile = gmail_service.users().getProfile(userId='me').execute()
-        user_email = profile.get('emailAddress', '')
-        
-        if not user_email:
-            print("✗ Could not get user email")
-        else:
-            event = scheduler.schedule_meeting(
-                start_time,
-                end_time,
-                [user_email],  # Send invite to yourself for testing
-                "Test Meeting - Please Ignore",
-                "This is a test meeting created by the AI Email Assistant.",
-                "Virtual Meeting"
-            )
-            
-            if event:
-                print(f"✓ Test meeting scheduled successfully! (ID: {event.get('id', 'unknown')})")
-                
-                # Cancel the test meeting to clean up
-                print("Cancelling test meeting...")
-                if scheduler.cancel_meeting(event['id'], notify_attendees=False):
-                    print("✓ Test meeting cancelled successfully")
-                else:
-                    print("✗ Failed to cancel test meeting")
-            else:
-                print("✗ Failed to schedule test meeting")
-    except Exception as e:
-        print(f"✗ Error in meeting scheduling test: {e}")
-    """
+    event = scheduler.schedule_meeting(
+        start_time,
+        end_time,
+        [user_email],  # Send invite to yourself for testing
+        "Test Meeting - Please Ignore",
+        "This is a test meeting created by the AI Email Assistant.",
+        "Virtual Meeting"
+    )
+    assert event, "Failed to schedule test meeting"
+    print(f"✓ Test meeting scheduled successfully! (ID: {event.get('id', 'unknown')})")
     
-    print("\nTest completed!")
+    # Cancel the test meeting to clean up
+    print("Cancelling test meeting...")
+    assert scheduler.cancel_meeting(event['id'], notify_attendees=False), "Failed to cancel test meeting"
+    print("✓ Test meeting cancelled successfully")
 
 if __name__ == "__main__":
-    test_calendar_features() 
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "-v"]))
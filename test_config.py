@@ -0,0 +1,59 @@
+"""
+Offline tests for configuration validation.
+"""
+
+import sys
+import pytest
+from utils.config import _OPTIONAL_VARS, _REQUIRED_VARS, validate_config
+
+@pytest.fixture
+def config():
+    """A valid configuration: the optional defaults plus dummy required values."""
+    return {**dict.fromkeys(_REQUIRED_VARS, 'x'), **_OPTIONAL_VARS}
+
+def test_defaults_are_valid(config):
+    assert validate_config(config) == []
+
+@pytest.mark.parametrize('value', ['true', 'FALSE', 'True'])
+def test_bool_values_accepted(config, value):
+    config['DEBUG'] = value
+    assert validate_config(config) == []
+
+@pytest.mark.parametrize('value', ['yes', '1', ''])
+def test_bool_values_rejected(config, value):
+    config['ENABLE_AUTO_TRANSLATION'] = value
+    assert validate_config(config) == ["ENABLE_AUTO_TRANSLATION must be 'true' or 'false'"]
+
+@pytest.mark.parametrize('value', ['abc', '', '1.5', '-5', '²'])
+def test_numeric_values_must_be_numbers(config, value):
+    config['MAX_THREADS_TO_FETCH'] = value
+    assert validate_config(config) == ["MAX_THREADS_TO_FETCH must be a number"]
+
+@pytest.mark.parametrize('value, valid', [('1', True), ('100', True), (' 50 ', True), ('0', False), ('101', False)])
+def test_numeric_ranges(config, value, valid):
+    config['MAX_THREADS_TO_FETCH'] = value
+    expected = [] if valid else ["MAX_THREADS_TO_FETCH must be between 1 and 100"]
+    assert validate_config(config) == expected
+
+def test_choices_and_language(config):
+    config['DEFAULT_REPLY_TONE'] = 'rude'
+    config['EMBED_DTYPE'] = 'float16'
+    config['DEFAULT_TARGET_LANGUAGE'] = 'eng'
+    assert validate_config(config) == [
+        "DEFAULT_REPLY_TONE must be 'formal', 'casual', or 'direct'",
+        "EMBED_DTYPE must be 'float32' or 'int8'",
+        "DEFAULT_TARGET_LANGUAGE must be a 2-letter language code",
+    ]
+
+def test_errors_are_reported_in_a_stable_order(config):
+    config['DEBUG'] = 'maybe'
+    config['ENABLE_AUTO_TRANSLATION'] = 'maybe'
+    config['MAX_THREADS_TO_FETCH'] = 'many'
+    assert validate_config(config) == [
+        "DEBUG must be 'true' or 'false'",
+        "ENABLE_AUTO_TRANSLATION must be 'true' or 'false'",
+        "MAX_THREADS_TO_FETCH must be a number",
+    ]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,107 @@
+"""
+Offline tests for the meeting slot search.
+The vectorized search is compared against a straightforward reference on random calendars.
+"""
+
+import sys
+import random
+import pytest
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+import backend.scheduler as scheduler_module
+from backend.scheduler import MeetingScheduler, _Busy, _merge_intervals
+
+TIMEZONES = ['UTC', 'America/New_York', 'Europe/Berlin', 'Asia/Kolkata', 'Australia/Sydney']
+
+class _Request:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self, **kwargs):
+        return self.result
+
+class FakeCalendarService:
+    """Just enough of the Calendar API for get_available_slots."""
+
+    def __init__(self, tz_name, busy):
+        self.tz_name = tz_name
+        self.busy = busy
+
+    def settings(self):
+        return self
+
+    def get(self, setting=None):
+        return _Request({'value': self.tz_name})
+
+    def freebusy(self):
+        return self
+
+    def query(self, body=None, **kwargs):
+        return _Request({'calendars': {item['id']: {'busy': self.busy} for item in body['items']}})
+
+def reference_slots(start_date, duration_minutes, days_ahead, tz, busy):
+    """Try every 30 minute start between 9 AM and 5 PM on weekdays against every busy entry."""
+    busy_times = [
+        (datetime.fromisoformat(entry['start'].replace('Z', '+00:00')),
+         datetime.fromisoformat(entry['end'].replace('Z', '+00:00')))
+        for entry in busy
+    ]
+    slot_duration = timedelta(minutes=duration_minutes)
+    slots = []
+    day = start_date.date()
+    for _ in range(days_ahead):
+        if day.weekday() < 5:
+            current = datetime.combine(day, time(9), tzinfo=tz)
+            day_end = datetime.combine(day, time(17), tzinfo=tz)
+            while current + slot_duration <= day_end:
+                if not any(current < end and current + slot_duration > start for start, end in busy_times):
+                    slots.append({
+                        'start': current.strftime("%Y-%m-%d %I:%M %p"),
+                        'end': (current + slot_duration).strftime("%Y-%m-%d %I:%M %p"),
+                        'duration': f"{duration_minutes} minutes"
+                    })
+                current += timedelta(minutes=30)
+        day += timedelta(days=1)
+    return slots[:10]
+
+def random_calendar(rng, tz):
+    """A start date (often in a DST transition month) and a list of overlapping busy entries."""
+    start_date = datetime(2026, rng.choice([1, 3, 4, 6, 10, 11]), rng.randint(1, 28),
+                          rng.randint(0, 23), rng.choice([0, 30]), tzinfo=tz)
+    busy = []
+    for _ in range(rng.randint(0, 40)):
+        busy_start = start_date + timedelta(minutes=15 * rng.randint(0, 4 * 24 * 10))
+        busy_end = busy_start + timedelta(minutes=15 * rng.randint(1, 16))
+        busy.append({
+            'start': busy_start.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'end': busy_end.astimezone(timezone.utc).isoformat()
+        })
+    return start_date, busy
+
+@pytest.mark.parametrize('seed', range(300))
+def test_available_slots_match_reference(seed, monkeypatch):
+    rng = random.Random(seed)
+    tz_name = rng.choice(TIMEZONES)
+    tz = ZoneInfo(tz_name)
+    start_date, busy = random_calendar(rng, tz)
+    duration_minutes = rng.choice([15, 30, 45, 60, 90, 120])
+    days_ahead = rng.randint(1, 14)
+
+    monkeypatch.setattr(scheduler_module, 'build',
+                        lambda *args, **kwargs: FakeCalendarService(tz_name, busy))
+    scheduler = MeetingScheduler(credentials=None)
+    # Look the timezone up first so the search runs on the sequential path
+    assert scheduler.get_user_timezone() == tz_name
+
+    expected = reference_slots(start_date, duration_minutes, days_ahead, tz, busy)
+    assert scheduler.get_available_slots(start_date, duration_minutes, days_ahead) == expected
+    # A repeat lookup is served from the FreeBusy cache and must not change
+    assert scheduler.get_available_slots(start_date, duration_minutes, days_ahead) == expected
+
+def test_merge_intervals():
+    intervals = [_Busy(5, 7), _Busy(1, 3), _Busy(2, 4), _Busy(4, 5), _Busy(10, 12), _Busy(10, 11)]
+    assert _merge_intervals(intervals) == [_Busy(1, 7), _Busy(10, 12)]
+    assert _merge_intervals([]) == []
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,47 @@
+"""
+Offline tests for the quoted-history helpers used by thread translation.
+"""
+
+import sys
+import pytest
+from backend.translator import _split_quoted, _join_segments
+
+BODIES = [
+    "",
+    "No quotes here.",
+    "Sounds good.\n\n> Can we meet Tuesday?\n> Thanks",
+    "> Quoted first\nThen a reply\n",
+    "Top\n> one\n> two\nMiddle\n>three\nBottom",
+    "Reply\n> > nested\n> quote\n",
+    "a > b is not a quote\n",
+]
+
+@pytest.mark.parametrize('body', BODIES)
+def test_split_quoted_round_trips(body):
+    segments = _split_quoted(body)
+    assert "".join(segments) == body
+    assert all(segments) or segments == [""]
+
+def test_split_quoted_separates_quotes():
+    segments = _split_quoted("Sounds good.\n\n> Can we meet Tuesday?\n> Thanks\nBye")
+    assert segments == ["Sounds good.\n\n", "> Can we meet Tuesday?\n> Thanks\n", "Bye"]
+
+def test_split_quoted_shared_history_is_identical():
+    # The same quoted history in two replies yields the same segment, so it is translated once
+    history = "> Original question\n> on two lines\n"
+    first = _split_quoted("First reply\n" + history)
+    second = _split_quoted("Second reply\n" + history)
+    assert first[-1] == second[-1] == history
+
+@pytest.mark.parametrize('body', BODIES)
+def test_join_segments_identity(body):
+    segments = _split_quoted(body)
+    assert _join_segments(segments, segments) == body
+
+def test_join_segments_restores_trimmed_newlines():
+    originals = ["Hola\n", "> Que tal\n", "Adios"]
+    translations = ["Hello", "> How are you", "Bye"]
+    assert _join_segments(originals, translations) == "Hello\n> How are you\nBye"
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -3,10 +3,13 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+import json
 import pickle
+import tempfile
 from pathlib import Path
+from typing import Optional
 import logging
-from cachetools import LRUCache
+from functools import lru_cache
 
 # Disable the googleapiclient file_cache warning
 logging.getLogger('googleapiclient.discovery_cache').setLevel(logging.ERROR)
@@ -18,27 +21,67 @@ SCOPES = [
     'https://www.googleapis.com/auth/calendar',         # Full access to Calendar
     'https://www.googleapis.com/auth/calendar.events'   # Full access to Calendar events
 ]
+_SCOPES_SET = frozenset(SCOPES)
 
+# OAuth token, stored as the JSON produced by Credentials.to_json()
+TOKEN_PATH = Path('token.json')
+
+# Token file written by older versions; migrated to TOKEN_PATH on first load
+_LEGACY_TOKEN_PATH = Path('token.pickle')
+
+def _load_credentials() -> Optional[Credentials]:
+    """Load stored credentials, migrating a legacy pickled token if needed."""
+    if TOKEN_PATH.exists():
+        try:
+            return Credentials.from_authorized_user_info(json.loads(TOKEN_PATH.read_text()))
+        except (ValueError, json.JSONDecodeError) as e:
+            # A token without a refresh_token, or a corrupt file: authorize again
+            logging.warning(f"Ignoring unusable token in {TOKEN_PATH}: {e}")
+            return None
+    
+    if _LEGACY_TOKEN_PATH.exists():
+        with open(_LEGACY_TOKEN_PATH, 'rb') as token:
+            creds = pickle.load(token)
+        if creds:
+            logging.info(f"Migrating {_LEGACY_TOKEN_PATH} to {TOKEN_PATH}")
+            _save_credentials(creds)
+            _LEGACY_TOKEN_PATH.unlink()
+        return creds
+    
+    return None
+
+def _save_credentials(creds: Credentials) -> None:
+    """Write credentials atomically so a crash never leaves a truncated token file."""
+    # A unique temp file, so processes refreshing at the same time don't clobber each other's
+    fd, tmp_path = tempfile.mkstemp(dir=TOKEN_PATH.parent, prefix=TOKEN_PATH.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as tmp:
+            tmp.write(creds.to_json())
+        os.replace(tmp_path, TOKEN_PATH)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+@lru_cache(maxsize=1)
 def get_gmail_service():
-    """Get Gmail API service instance and credentials."""
-    creds = None
-    token_path = Path('token.pickle')
+    """Get Gmail API service instance and credentials.
     
+    The result is memoized for the process; the credentials refresh themselves in place,
+    and revoke_credentials clears the memo.
+    """
     # Check if we need to handle scope changes
     scope_expanded = False
     
     # Load existing credentials if available
-    if token_path.exists():
-        with open(token_path, 'rb') as token:
-            creds = pickle.load(token)
-            
+    creds = _load_credentials()
+    if creds:
         # Check if the credentials have the required scopes
         if creds and creds.valid:
-            current_scopes = creds.scopes if hasattr(creds, 'scopes') else []
-            missing_scopes = [scope for scope in SCOPES if scope not in current_scopes]
+            current_scopes = frozenset(getattr(creds, 'scopes', None) or ())
+            missing_scopes = _SCOPES_SET - current_scopes
             
             if missing_scopes:
-                logging.info(f"Need to update token with new scopes: {missing_scopes}")
+                logging.info(f"Need to update token with new scopes: {sorted(missing_scopes)}")
                 creds = None
                 scope_expanded = True
     
@@ -49,35 +92,28 @@ def get_gmail_service():
         else:
             if scope_expanded:
                 logging.info("Creating new token with expanded scopes")
-                if token_path.exists():
-                    token_path.unlink()  # Remove the old token
+                if TOKEN_PATH.exists():
+                    TOKEN_PATH.unlink()  # Remove the old token
             
             flow = InstalledAppFlow.from_client_secrets_file(
                 'credentials.json', SCOPES)
             creds = flow.run_local_server(port=0)
         
         # Save credentials for future use
-        with open(token_path, 'wb') as token:
-            pickle.dump(creds, token)
+        _save_credentials(creds)
     
-    # Build and return Gmail service and credentials with in-memory cache
-    cache = LRUCache(maxsize=1024)
-    service = build('gmail', 'v1', credentials=creds, cache=cache)
+    # Build from the discovery document bundled with googleapiclient, so no Discovery request is made
+    service = build('gmail', 'v1', credentials=creds, static_discovery=True)
     return service, creds
 
 def check_credentials():
     """Check if valid credentials exist."""
-    token_path = Path('token.pickle')
-    if not token_path.exists():
-        return False
-    
-    with open(token_path, 'rb') as token:
-        creds = pickle.load(token)
-    
+    creds = _load_credentials()
     return creds and creds.valid
 
 def revoke_credentials():
     """Revoke and remove stored credentials."""
-    token_path = Path('token.pickle')
-    if token_path.exists():
-        token_path.unlink() 
\ No newline at end of file
+    for token_path in (TOKEN_PATH, _LEGACY_TOKEN_PATH):
+        if token_path.exists():
+            token_path.unlink()
+    get_gmail_service.cache_clear() 
\ No newline at end of file
@@ -1,96 +1,115 @@
 import os
+import functools
+from types import MappingProxyType
 from dotenv import load_dotenv
 from typing import Dict, List
 
+# Required environment variables
+_REQUIRED_VARS = (
+    'GMAIL_CLIENT_ID',
+    'GMAIL_CLIENT_SECRET',
+    'GEMINI_API_KEY',
+    'PINECONE_API_KEY',
+    'PINECONE_ENVIRONMENT'
+)
+
+# Optional environment variables with defaults
+_OPTIONAL_VARS = {
+    'DEBUG': 'False',
+    'LOG_LEVEL': 'INFO',
+    'DEFAULT_REPLY_TONE': 'formal',
+    'MAX_THREADS_TO_FETCH': '10',
+    'MEETING_DURATION_MINUTES': '30',
+    'DAYS_AHEAD_FOR_SCHEDULING': '7',
+    'DEFAULT_TARGET_LANGUAGE': 'en',
+    'ENABLE_AUTO_TRANSLATION': 'False',
+    'SESSION_TIMEOUT_MINUTES': '60',
+    'OLLAMA_HOST': 'http://localhost:11434',
+    'OLLAMA_MODEL': 'llama2',
+    'EMBED_BATCH_SIZE': '64',
+    'EMBED_CACHE_TTL_SECONDS': '0',
+    'EMBED_DTYPE': 'float32'
+}
+
+# Every variable load_config reads, required ones defaulting to None
+_ALL_VARS = {**dict.fromkeys(_REQUIRED_VARS), **_OPTIONAL_VARS}
+
+@functools.lru_cache(maxsize=1)
+def _dotenv_once() -> None:
+    """Load the .env file into the environment, only the first time it's called."""
+    load_dotenv()
+
 def load_config() -> Dict[str, str]:
     """Load and validate environment variables."""
-    # Load .env file
-    load_dotenv()
-    
-    # Required environment variables
-    required_vars = [
-        'GMAIL_CLIENT_ID',
-        'GMAIL_CLIENT_SECRET',
-        'GEMINI_API_KEY',
-        'PINECONE_API_KEY',
-        'PINECONE_ENVIRONMENT'
-    ]
-    
-    # Optional environment variables with defaults
-    optional_vars = {
-        'DEBUG': 'False',
-        'LOG_LEVEL': 'INFO',
-        'DEFAULT_REPLY_TONE': 'formal',
-        'MAX_THREADS_TO_FETCH': '10',
-        'MEETING_DURATION_MINUTES': '30',
-        'DAYS_AHEAD_FOR_SCHEDULING': '7',
-        'DEFAULT_TARGET_LANGUAGE': 'en',
-        'ENABLE_AUTO_TRANSLATION': 'False',
-        'SESSION_TIMEOUT_MINUTES': '60',
-        'OLLAMA_HOST': 'http://localhost:11434',
-        'OLLAMA_MODEL': 'llama2'
-    }
+    _dotenv_once()
+    config = {var: os.environ.get(var, default) for var, default in _ALL_VARS.items()}
     
     # Check required variables
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    missing_vars = [var for var in _REQUIRED_VARS if not config[var]]
     if missing_vars:
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
     
-    # Get all environment variables
-    config = {}
-    
-    # Add required variables
-    for var in required_vars:
-        config[var] = os.getenv(var)
-    
-    # Add optional variables with defaults
-    for var, default in optional_vars.items():
-        config[var] = os.getenv(var, default)
-    
     return config
 
+# Validation rules
+_BOOL_VARS = ('DEBUG', 'ENABLE_AUTO_TRANSLATION')
+_BOOL_VALUES = frozenset({'true', 'false'})
+_NUMERIC_RANGES = MappingProxyType({
+    'MAX_THREADS_TO_FETCH': (1, 100),
+    'MEETING_DURATION_MINUTES': (15, 480),
+    'DAYS_AHEAD_FOR_SCHEDULING': (1, 30),
+    'SESSION_TIMEOUT_MINUTES': (5, 1440),
+    'EMBED_BATCH_SIZE': (1, 100),  # Gemini accepts at most 100 texts per embedding request
+    'EMBED_CACHE_TTL_SECONDS': (0, 2592000)  # 0 keeps cached embeddings until evicted
+})
+_TONES = frozenset({'formal', 'casual', 'direct'})
+_EMBED_DTYPES = frozenset({'float32', 'int8'})
+
 def validate_config(config: Dict[str, str]) -> List[str]:
     """Validate configuration values."""
     errors = []
     
     # Validate boolean values
-    bool_vars = ['DEBUG', 'ENABLE_AUTO_TRANSLATION']
-    for var in bool_vars:
-        if config[var].lower() not in ['true', 'false']:
+    for var in _BOOL_VARS:
+        if config[var].lower() not in _BOOL_VALUES:
             errors.append(f"{var} must be 'true' or 'false'")
     
-    # Validate numeric values
-    numeric_vars = {
-        'MAX_THREADS_TO_FETCH': (1, 100),
-        'MEETING_DURATION_MINUTES': (15, 480),
-        'DAYS_AHEAD_FOR_SCHEDULING': (1, 30),
-        'SESSION_TIMEOUT_MINUTES': (5, 1440)
-    }
-    
-    for var, (min_val, max_val) in numeric_vars.items():
-        try:
-            value = int(config[var])
-            if not min_val <= value <= max_val:
-                errors.append(f"{var} must be between {min_val} and {max_val}")
-        except ValueError:
+    # Validate numeric values; isdecimal rejects obvious non-numbers without raising
+    for var, (min_val, max_val) in _NUMERIC_RANGES.items():
+        value = config[var].strip()
+        if not value.isdecimal():
             errors.append(f"{var} must be a number")
+        elif not min_val <= int(value) <= max_val:
+            errors.append(f"{var} must be between {min_val} and {max_val}")
     
     # Validate tone
-    if config['DEFAULT_REPLY_TONE'] not in ['formal', 'casual', 'direct']:
+    if config['DEFAULT_REPLY_TONE'] not in _TONES:
         errors.append("DEFAULT_REPLY_TONE must be 'formal', 'casual', or 'direct'")
     
+    # Validate embedding storage format
+    if config['EMBED_DTYPE'] not in _EMBED_DTYPES:
+        errors.append("EMBED_DTYPE must be 'float32' or 'int8'")
+    
     # Validate language code
     if not config['DEFAULT_TARGET_LANGUAGE'].isalpha() or len(config['DEFAULT_TARGET_LANGUAGE']) != 2:
         errors.append("DEFAULT_TARGET_LANGUAGE must be a 2-letter language code")
     
     return errors
 
-def get_config() -> Dict[str, str]:
-    """Get validated configuration."""
+@functools.lru_cache(maxsize=1)
+def _validated_config() -> Dict[str, str]:
+    """Load and validate the configuration once per process; failures are not cached."""
     config = load_config()
     errors = validate_config(config)
     
     if errors:
         raise ValueError("Configuration validation failed:\n" + "\n".join(errors))
     
-    return config 
\ No newline at end of file
+    return config
+
+def get_config() -> Dict[str, str]:
+    """Get validated configuration.
+
+    The environment is read once per process; callers get their own copy of the result.
+    """
+    return dict(_validated_config())
@@ -1,22 +1,179 @@
 import google.generativeai as genai
 import os
-from typing import List
+import atexit
+import asyncio
+import hashlib
+import functools
+import threading
+import queue
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
 import numpy as np
 import logging
-from dotenv import load_dotenv
+from utils.config import _dotenv_once
+from utils.llm_cache import _default_cache_dir
+from cachetools import LRUCache, TTLCache
 
-load_dotenv()
+try:
+    import simsimd
+except ImportError:  # Optional: the NumPy implementation is used when simsimd isn't installed
+    simsimd = None
+
+try:
+    from numba import njit
+except ImportError:  # Optional: JIT-compiled fallback kernel when simsimd is missing
+    njit = None
+
+try:
+    from scipy.spatial.distance import cdist as scipy_cdist
+except ImportError:  # Optional: bulk cosine kernel used when simsimd isn't installed
+    scipy_cdist = None
+
+_dotenv_once()
 logging.basicConfig(level=logging.INFO)
 
-def get_embedding(text: str) -> List[float]:
-    """Generate embedding for text using Gemini."""
+# Contract for get_most_similar: while True, float inputs are trusted to be unit length
+# (as get_embedding and get_embeddings_batch return) and are ranked by dot product without
+# computing any norms. Set to False when ranking vectors that may not be normalized.
+ASSUME_NORMALIZED = True
+
+# Dimension of the vectors models/embedding-001 returns
+EMBED_DIM = 768
+
+# Returned when an embedding can't be generated; read-only and shared, like cached embeddings
+_ZERO_EMB = np.zeros(EMBED_DIM, dtype=np.float32)
+_ZERO_EMB.setflags(write=False)
+
+# Storage format for embedding indexes: 'float32', or 'int8' for a 4x smaller quantized store
+EMBED_DTYPE = os.getenv('EMBED_DTYPE', 'float32')
+
+# Embeddings of recently seen texts, so regenerated drafts and UI retries skip the API.
+# Entries never expire unless EMBED_CACHE_TTL_SECONDS is set to a positive number.
+_EMBED_CACHE_TTL_SECONDS = int(os.getenv('EMBED_CACHE_TTL_SECONDS', '0'))
+_embedding_cache = (
+    TTLCache(maxsize=4096, ttl=_EMBED_CACHE_TTL_SECONDS) if _EMBED_CACHE_TTL_SECONDS > 0
+    else LRUCache(maxsize=4096)
+)
+_embedding_cache_lock = threading.Lock()
+
+def _text_key(text: str) -> str:
+    """Fixed-size cache key for a piece of text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+# Anything cosine_similarity and get_most_similar accept as a single vector
+Vector = Union[np.ndarray, Sequence[float]]
+
+@functools.lru_cache(maxsize=1)
+def _ensure_configured() -> None:
+    """Configure the Gemini SDK on first use; a missing key raises and is retried next call.
+
+    Tests can reset it with _ensure_configured.cache_clear().
+    """
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+    genai.configure(api_key=api_key)
+
+class _EmbeddingStore:
+    """SQLite tier below the in-memory cache, so embeddings survive restarts.
+
+    Reads query the database directly. Writes are queued and committed in batches
+    by a background thread, so generating an embedding never waits on the disk.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS emb (key BLOB PRIMARY KEY, vec BLOB NOT NULL)')
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Get a stored embedding as a read-only float32 array, or None if it is missing."""
+        try:
+            with self._lock:
+                row = self._connect().execute('SELECT vec FROM emb WHERE key = ?', (key,)).fetchone()
+            return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+        except Exception as e:
+            logging.error(f"Error reading embedding cache: {e}")
+            return None
+
+    def put(self, key: bytes, embedding: np.ndarray) -> None:
+        """Queue an embedding to be written by the background writer."""
+        self._pending.put((key, embedding.astype(np.float32, copy=False).tobytes()))
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name='embedding-cache-writer', daemon=True)
+                    self._writer.start()
+
+    def flush(self) -> None:
+        """Block until every queued embedding has been written."""
+        if self._writer is not None:
+            self._pending.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            rows = [self._pending.get()]
+            # Commit everything queued so far in one transaction
+            while True:
+                try:
+                    rows.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._lock:
+                    conn = self._connect()
+                    conn.executemany('INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)', rows)
+                    conn.commit()
+            except Exception as e:
+                logging.error(f"Error writing embedding cache: {e}")
+            finally:
+                for _ in rows:
+                    self._pending.task_done()
+
+_embedding_store = _EmbeddingStore(_default_cache_dir() / 'emb.sqlite')
+# Write out embeddings still queued when the app exits
+atexit.register(_embedding_store.flush)
+
+def _cached_embedding(text: str) -> Optional[np.ndarray]:
+    """Get a cached embedding for text from memory, then disk, or None if it was never embedded."""
+    key = _text_key(text)
+    with _embedding_cache_lock:
+        embedding = _embedding_cache.get(key)
+    if embedding is None:
+        embedding = _embedding_store.get(bytes.fromhex(key))
+        if embedding is not None:
+            with _embedding_cache_lock:
+                _embedding_cache[key] = embedding
+    return embedding
+
+def _remember_embedding(text: str, embedding: np.ndarray) -> None:
+    """Cache a successfully generated embedding, read-only since every caller shares it."""
+    embedding.setflags(write=False)
+    key = _text_key(text)
+    with _embedding_cache_lock:
+        _embedding_cache[key] = embedding
+    _embedding_store.put(bytes.fromhex(key), embedding)
+
+def get_embedding(text: str) -> np.ndarray:
+    """Generate a read-only, unit-length float32 embedding for text using Gemini."""
+    cached = _cached_embedding(text)
+    if cached is not None:
+        return cached
     try:
-        # Initialize Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-            
-        genai.configure(api_key=api_key)
+        _ensure_configured()
         
         # Generate embedding using the embedding model
         embedding = genai.embed_content(
@@ -31,66 +188,350 @@ def get_embedding(text: str) -> List[float]:
         else:
             embedding_values = embedding['embedding']
         
-        # Normalize the embedding
-        embedding_array = np.array(embedding_values)
-        norm = np.linalg.norm(embedding_array)
-        if norm > 0:
-            embedding_array = embedding_array / norm
+        embedding = _normalize(embedding_values)
+        _remember_embedding(text, embedding)
+        return embedding
+    except Exception as e:
+        logging.error(f"Error generating embedding: {e}")
+        return _ZERO_EMB
+
+async def get_embedding_async(text: str) -> np.ndarray:
+    """Generate embedding for text using Gemini without blocking the event loop."""
+    cached = _cached_embedding(text)
+    if cached is not None:
+        return cached
+    
+    # Older SDKs have no async embedding call; run the sync one in a worker thread instead
+    embed_content_async = getattr(genai, 'embed_content_async', None)
+    if embed_content_async is None:
+        return await asyncio.to_thread(get_embedding, text)
+    
+    try:
+        _ensure_configured()
+        
+        embedding = await embed_content_async(
+            model="models/embedding-001",
+            content=text,
+            task_type="retrieval_document",
+        )
         
-        return embedding_array.tolist()
+        if hasattr(embedding, 'embedding'):
+            embedding_values = embedding.embedding
+        else:
+            embedding_values = embedding['embedding']
+        
+        embedding = _normalize(embedding_values)
+        _remember_embedding(text, embedding)
+        return embedding
     except Exception as e:
         logging.error(f"Error generating embedding: {e}")
-        # Return a zero vector of appropriate dimension
-        return [0.0] * 768  # Default dimension for many embedding models
+        return _ZERO_EMB
 
-def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
-    """Calculate cosine similarity between two vectors."""
+async def embed_many(texts: List[str], max_concurrency: int = 16) -> List[np.ndarray]:
+    """Embed texts concurrently, with at most max_concurrency requests in flight.
+    
+    Args:
+        texts: Texts to embed
+        max_concurrency: Maximum number of concurrent Gemini requests
+        
+    Returns:
+        One normalized embedding per text, in input order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def embed(text: str) -> np.ndarray:
+        async with semaphore:
+            return await get_embedding_async(text)
+    
+    return list(await asyncio.gather(*(embed(text) for text in texts)))
+
+def _row_norms(matrix: np.ndarray) -> np.ndarray:
+    """L2 norm of each row, without the full-size temporary np.linalg.norm allocates for squares."""
+    return np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+
+def _normalize(embedding_values: List[float]) -> np.ndarray:
+    """Scale an embedding to a unit-length float32 array, leaving a zero vector unchanged."""
+    embedding_array = np.array(embedding_values, dtype=np.float32)
+    if embedding_array.shape != (EMBED_DIM,):
+        raise ValueError(f"Expected a {EMBED_DIM}-dimensional embedding, got shape {embedding_array.shape}")
+    norm = np.linalg.norm(embedding_array)
+    if norm > 0:
+        embedding_array /= norm
+    
+    return embedding_array
+
+def get_embeddings_batch(texts: List[str]) -> np.ndarray:
+    """Generate embeddings for many texts with one Gemini request per batch.
+    
+    Args:
+        texts: Texts to embed
+        
+    Returns:
+        (len(texts), D) float32 matrix with one L2-normalized embedding per row, in input order
+    """
+    if not texts:
+        return np.empty((0, EMBED_DIM), dtype=np.float32)
+    
+    batch_size = int(os.getenv('EMBED_BATCH_SIZE', '64'))
+    # Filled in place batch by batch; rows of failed batches stay zero vectors
+    embeddings = np.zeros((len(texts), EMBED_DIM), dtype=np.float32)
     try:
-        if not vec1 or not vec2:
-            return 0.0
+        _ensure_configured()
+        
+        for start in range(0, len(texts), batch_size):
+            response = genai.embed_content(
+                model="models/embedding-001",
+                content=texts[start:start + batch_size],
+                task_type="retrieval_document",
+            )
+            batch = response.embedding if hasattr(response, 'embedding') else response['embedding']
             
-        vec1 = np.array(vec1)
-        vec2 = np.array(vec2)
-        
-        # Check if vectors have the same dimension
-        if vec1.shape != vec2.shape:
-            logging.warning(f"Vectors have different dimensions: {vec1.shape} vs {vec2.shape}")
-            # Pad the shorter vector or truncate the longer one
-            min_dim = min(len(vec1), len(vec2))
-            vec1 = vec1[:min_dim]
-            vec2 = vec2[:min_dim]
+            matrix = np.asarray(batch, dtype=np.float32)
+            if matrix.ndim != 2 or matrix.shape[1] != EMBED_DIM:
+                raise ValueError(f"Expected {EMBED_DIM}-dimensional embeddings, got shape {matrix.shape}")
+            rows = embeddings[start:start + len(matrix)]
+            rows[:] = matrix
+            
+            # Normalize all rows at once, leaving zero rows as they are
+            norms = _row_norms(rows)
+            norms[norms == 0] = 1.0
+            rows /= norms[:, None]
         
-        # Normalize vectors
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
+        return embeddings
+    except Exception as e:
+        logging.error(f"Error generating batch embeddings: {e}")
+        # Keep results for completed batches
+        return embeddings
+
+def embeddings_to_matrix(embeddings: Sequence[Vector]) -> np.ndarray:
+    """Stack embeddings (arrays or legacy lists of floats) into a contiguous (N, D) float32 matrix."""
+    if len(embeddings) == 0:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.ascontiguousarray(np.vstack(embeddings).astype(np.float32, copy=False))
+
+def quantize_embedding(embedding: Vector) -> Tuple[np.ndarray, float]:
+    """Quantize an embedding to int8 with a symmetric per-vector scale.
+    
+    Args:
+        embedding: Float embedding
+        
+    Returns:
+        Tuple of the int8 vector and the scale that maps it back (embedding ~= q * scale)
+    """
+    embedding = np.asarray(embedding, dtype=np.float32)
+    max_abs = float(np.abs(embedding).max()) if embedding.size else 0.0
+    scale = max_abs / 127 if max_abs > 0 else 1.0
+    return np.round(embedding / scale).clip(-128, 127).astype(np.int8), scale
+
+def dequantize_embedding(quantized: np.ndarray, scale: float) -> np.ndarray:
+    """Recover an approximate float32 embedding from quantize_embedding output."""
+    return quantized.astype(np.float32) * scale
+
+def to_storage(embeddings: np.ndarray) -> np.ndarray:
+    """Convert an (N, D) embedding matrix to the EMBED_DTYPE storage format.
+    
+    Rows are quantized independently. Their scales are dropped because cosine ranking
+    doesn't depend on vector length; get_most_similar accepts the result directly.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if EMBED_DTYPE != 'int8':
+        return embeddings
+    max_abs = np.abs(embeddings).max(axis=1, keepdims=True)
+    max_abs[max_abs == 0] = 1.0
+    return np.round(embeddings * (127 / max_abs)).clip(-128, 127).astype(np.int8)
+
+def cosine_similarity_i8(vec1: np.ndarray, vec2: np.ndarray) -> float:
+    """Calculate cosine similarity between two int8-quantized vectors."""
+    try:
+        if simsimd is not None:
+            if not vec1.any() or not vec2.any():
+                return 0.0
+            return 1.0 - float(simsimd.cosine(vec1, vec2, "i8"))
         
-        if norm1 == 0 or norm2 == 0:
+        # Widen before multiplying so the int8 products can't overflow
+        vec1 = vec1.astype(np.int32)
+        vec2 = vec2.astype(np.int32)
+        denominator = np.sqrt(float(np.dot(vec1, vec1)) * float(np.dot(vec2, vec2)))
+        if denominator == 0:
             return 0.0
+        return float(np.dot(vec1, vec2)) / denominator
+    except Exception as e:
+        logging.error(f"Error calculating similarity: {e}")
+        return 0.0
+
+def _simsimd_cos(vec1: np.ndarray, vec2: np.ndarray) -> float:
+    """Cosine similarity of two equal-length float32 vectors using simsimd."""
+    # A zero vector has no direction; simsimd would report two of them as identical
+    if not vec1.any() or not vec2.any():
+        return 0.0
+    return 1.0 - float(simsimd.cosine(vec1, vec2))
+
+def _numpy_cos(vec1: np.ndarray, vec2: np.ndarray) -> float:
+    """Cosine similarity of two equal-length float32 vectors using NumPy."""
+    # One fused pass per vector for the squared norms and a single sqrt, instead of normalizing both
+    denominator = np.sqrt(np.vdot(vec1, vec1) * np.vdot(vec2, vec2))
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(vec1, vec2) / denominator)
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _numba_cos(vec1, vec2):
+        """Cosine similarity in a single pass over both vectors."""
+        dot = 0.0
+        norm1 = 0.0
+        norm2 = 0.0
+        for i in range(vec1.shape[0]):
+            dot += vec1[i] * vec2[i]
+            norm1 += vec1[i] * vec1[i]
+            norm2 += vec2[i] * vec2[i]
+        if norm1 == 0.0 or norm2 == 0.0:
+            return 0.0
+        return dot / np.sqrt(norm1 * norm2)
+
+# Fastest available pairwise kernel, chosen once: simsimd, then Numba, then NumPy
+if simsimd is not None:
+    _best_cos = _simsimd_cos
+elif njit is not None:
+    _best_cos = _numba_cos
+    # Compile now so the first real comparison doesn't pay for JIT compilation
+    _numba_cos(np.ones(EMBED_DIM, dtype=np.float32), np.ones(EMBED_DIM, dtype=np.float32))
+else:
+    _best_cos = _numpy_cos
+
+def _simsimd_bulk_cos(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a query to every row of a float32 matrix using simsimd."""
+    return 1.0 - np.asarray(simsimd.cdist(query[None, :], matrix, metric="cosine"))[0]
+
+def _scipy_bulk_cos(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a query to every row of a float32 matrix using SciPy."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 1.0 - scipy_cdist(query[None, :], matrix, metric="cosine")[0]
+
+def _numpy_bulk_cos(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a query to every row of a float32 matrix using one matrix-vector product."""
+    norms = _row_norms(matrix) * np.linalg.norm(query)
+    norms[norms == 0] = 1.0
+    return (matrix @ query) / norms
+
+# Fastest available kernel for scoring many candidates at once, chosen once: simsimd, then SciPy, then NumPy
+if simsimd is not None:
+    _best_bulk_cos = _simsimd_bulk_cos
+elif scipy_cdist is not None:
+    _best_bulk_cos = _scipy_bulk_cos
+else:
+    _best_bulk_cos = _numpy_bulk_cos
+
+def cosine_similarity(vec1: Vector, vec2: Vector) -> float:
+    """Calculate cosine similarity between two vectors."""
+    try:
+        len1, len2 = len(vec1), len(vec2)
+        if len1 == 0 or len2 == 0:
+            return 0.0
+        
+        if vec1 is vec2:
+            # Any vector matches itself, except a zero vector (failed embedding), which has no direction
+            return 1.0 if np.any(vec1) else 0.0
+        
+        if len1 != len2:
+            logging.warning(f"Vectors have different dimensions: {len1} vs {len2}")
+            # Truncate the longer vector to the shorter one's length
+            min_dim = min(len1, len2)
+            vec1 = vec1[:min_dim]
+            vec2 = vec2[:min_dim]
             
-        vec1 = vec1 / norm1
-        vec2 = vec2 / norm2
+        vec1 = np.ascontiguousarray(vec1, dtype=np.float32)
+        vec2 = np.ascontiguousarray(vec2, dtype=np.float32)
         
         # Calculate cosine similarity
-        return float(np.dot(vec1, vec2))
+        return float(_best_cos(vec1, vec2))
     except Exception as e:
         logging.error(f"Error calculating similarity: {e}")
         return 0.0
 
-def get_most_similar(query_embedding: List[float], embeddings: List[List[float]], k: int = 3) -> List[int]:
-    """Find k most similar embeddings to the query embedding."""
+def dot_similarity(vec1: Vector, vec2: Vector) -> float:
+    """Similarity of two unit-length vectors, which for them equals cosine similarity."""
+    return float(np.dot(np.asarray(vec1, dtype=np.float32), np.asarray(vec2, dtype=np.float32)))
+
+def _top_k(similarities: np.ndarray, k: int) -> List[int]:
+    """Indices of the k highest scores, best first."""
+    if not 0 < k < len(similarities):
+        return np.argsort(similarities)[-k:][::-1].tolist()
+    
+    # Select the k best in linear time, then sort only those k
+    top_k_indices = np.argpartition(similarities, -k)[-k:]
+    top_k_indices = top_k_indices[np.argsort(-similarities[top_k_indices])]
+    return top_k_indices.tolist()
+
+def top_k_similar(query: np.ndarray, matrix: np.ndarray, k: int = 3) -> List[int]:
+    """Find the k rows of a matrix of unit vectors most similar to a unit-length query.
+    
+    Scores every candidate with a single matrix-vector product. Build the matrix once
+    with embeddings_to_matrix and reuse it across queries.
+    
+    Args:
+        query: Unit-length query vector of length D
+        matrix: C-contiguous (N, D) float32 matrix of unit-length candidates
+        k: Number of indices to return
+        
+    Returns:
+        Indices of the k most similar rows, best first
+    """
+    assert matrix.dtype == np.float32, f"matrix must be float32, got {matrix.dtype}"
+    assert matrix.flags.c_contiguous, "matrix must be C-contiguous"
+    return _top_k(matrix @ query, k)
+
+def get_most_similar(query_embedding: Vector, embeddings: Union[np.ndarray, Sequence[Vector]],
+                     k: int = 3) -> List[int]:
+    """Find k most similar embeddings to the query embedding.
+    
+    Accepts lists and int8 stores. While ASSUME_NORMALIZED is True, float inputs must be
+    unit length (as get_embedding returns) and are ranked by dot product; set it to False
+    to rank arbitrary vectors by cosine similarity. Prefer top_k_similar for a prebuilt
+    float32 matrix of unit vectors.
+    
+    Args:
+        query_embedding: Query vector
+        embeddings: (N, D) float32 matrix of candidates, or a legacy list of vectors
+        k: Number of indices to return
+        
+    Returns:
+        Indices of the k most similar candidates, best first
+    """
     try:
-        if not query_embedding or not embeddings:
+        if len(query_embedding) == 0 or len(embeddings) == 0:
             return []
             
-        similarities = [
-            cosine_similarity(query_embedding, emb)
-            for emb in embeddings
-        ]
+        similarities = None
+        quantized = getattr(embeddings, 'dtype', None) == np.int8
+        try:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            # Build the matrix once; a float32 matrix that is already contiguous is used as is
+            matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        except ValueError:
+            # Ragged candidates (mixed dimensions) go through the pairwise path below
+            matrix = None
+        
+        if matrix is not None and matrix.ndim == 2 and matrix.shape[1] == query.shape[0]:
+            if ASSUME_NORMALIZED and not quantized:
+                # For unit vectors cosine similarity is the dot product: one matrix-vector product scores all
+                return top_k_similar(query, matrix, k)
+            
+            # Quantized or possibly not unit length: score all candidates in one call with true cosine similarity
+            similarities = _best_bulk_cos(query, matrix)
+            # Match cosine_similarity, which scores zero vectors as 0
+            similarities[~matrix.any(axis=1)] = 0.0
+            if not query.any():
+                similarities[:] = 0.0
         
-        # Get indices of top k similar embeddings
-        top_k_indices = np.argsort(similarities)[-k:][::-1]
+        if similarities is None:
+            # Ragged candidates can only be compared one pair at a time
+            similarities = [
+                cosine_similarity(query_embedding, emb)
+                for emb in embeddings
+            ]
         
-        return top_k_indices.tolist()
+        return _top_k(np.asarray(similarities), k)
     except Exception as e:
         logging.error(f"Error finding similar embeddings: {e}")
-        return [] 
\ No newline at end of file
+        return []
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import functools
+import inspect
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from utils.config import _dotenv_once
+
+# Default lifetime of a cached LLM response
+DEFAULT_TTL_SECONDS = 30 * 86400
+
+def _default_cache_dir() -> Path:
+    """Get the cache directory, overridable with LLM_CACHE_DIR (also read from .env)."""
+    # Importers build their caches before loading .env themselves, so load it here first
+    _dotenv_once()
+    return Path(os.getenv('LLM_CACHE_DIR', os.path.expanduser('~/.cache/email_ai')))
+
+class PersistentCache:
+    """Thread-safe key/value store backed by SQLite, shared across processes and restarts.
+
+    Values must be JSON serializable. The database is opened on first use.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+            # WAL lets several app processes read while one writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if it is missing, expired or unreadable."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self.delete(key)
+                return None
+            return json.loads(value)
+        except Exception as e:
+            logging.error(f"Error reading LLM cache: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = DEFAULT_TTL_SECONDS) -> None:
+        """Store a value, expiring after ttl seconds (never if ttl is None)."""
+        try:
+            expires_at = time.time() + ttl if ttl is not None else None
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), expires_at)
+                )
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Error writing LLM cache: {e}")
+
+    def delete(self, key: str) -> None:
+        """Remove a single entry."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Error deleting from LLM cache: {e}")
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute('DELETE FROM cache')
+                conn.commit()
+        except Exception as e:
+            logging.error(f"Error clearing LLM cache: {e}")
+
+CACHE = PersistentCache(_default_cache_dir() / 'llm.sqlite3')
+
+def cache_key(*parts: Any) -> str:
+    """Build a fixed-size key from the model, prompt version and inputs of a call."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def _model_id(instance: Any) -> str:
+    """Name of the model behind a client: Gemini models expose model_name, Ollama stores the name."""
+    model = getattr(instance, 'model', None)
+    return str(getattr(model, 'model_name', model))
+
+def method_key(namespace: str, instance: Any, prompt_version: str, *args: Any, **kwargs: Any) -> str:
+    """Key llm_cached stores a method call under, for code that reads or fills its entries directly."""
+    return cache_key(namespace, _model_id(instance), prompt_version, args, kwargs)
+
+def llm_cached(prompt_version: str, ttl: Optional[float] = DEFAULT_TTL_SECONDS,
+               namespace: Optional[str] = None) -> Callable:
+    """Cache a client method's result on disk, keyed by model, prompt version and arguments.
+
+    Bump prompt_version whenever the prompt changes so old responses are not reused.
+    None results and exceptions are never cached. Works on sync and async methods.
+
+    Args:
+        prompt_version: Version of the prompt the method sends
+        ttl: Seconds before a cached response expires
+        namespace: Key prefix, defaulting to the method name; give a sync method and
+            its async twin the same namespace so they share entries
+
+    Returns:
+        Decorator for methods of a client with a ``model`` attribute
+    """
+    def decorator(func: Callable) -> Callable:
+        prefix = namespace or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                key = method_key(prefix, self, prompt_version, *args, **kwargs)
+                result = CACHE.get(key)
+                if result is not None:
+                    return result
+                result = await func(self, *args, **kwargs)
+                if result is not None:
+                    CACHE.set(key, result, ttl)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = method_key(prefix, self, prompt_version, *args, **kwargs)
+            result = CACHE.get(key)
+            if result is not None:
+                return result
+            result = func(self, *args, **kwargs)
+            if result is not None:
+                CACHE.set(key, result, ttl)
+            return result
+        return wrapper
+    return decorator